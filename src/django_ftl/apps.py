@@ -1,5 +1,23 @@
 from django.apps import AppConfig
 
+from .conf import get_setting
+
 
 class DjangoFtlConfig(AppConfig):
     name = "django_ftl"
+
+    def ready(self):
+        if get_setting("PRELOAD_BUNDLES", False):
+            from .bundles import preload_bundles
+
+            preload_bundles(
+                locales=get_setting("PRELOAD_LOCALES", None),
+                gc_freeze=get_setting("PRELOAD_GC_FREEZE", False),
+                processes=get_setting("PRELOAD_PROCESSES", None),
+            )
+        if get_setting("HOT_RELOAD_SIGNAL", None) or get_setting(
+            "HOT_RELOAD_VERSION_FILE", None
+        ):
+            from .hot_reload import setup_hot_reload
+
+            setup_hot_reload()
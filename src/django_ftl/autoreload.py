@@ -1,34 +1,139 @@
 import logging
+import os
+import threading
+import time
+import weakref
 
 import django.core.signals as django_signals
-import pyinotify
+from django.core.exceptions import ImproperlyConfigured
+
+from .conf import get_setting
+
+try:
+    import pyinotify
+except ImportError:
+    pyinotify = None
 
 logger = logging.getLogger(__name__)
 
+BACKEND_AUTO = "auto"
+BACKEND_INOTIFY = "inotify"
+BACKEND_STAT = "stat"
+BACKEND_DJANGO = "django"
+BACKENDS = [BACKEND_AUTO, BACKEND_INOTIFY, BACKEND_STAT, BACKEND_DJANGO]
 
-class BundleModifiedHandler(pyinotify.ProcessEvent):
-    def my_init(self, reloader=None):
-        self.reloader = reloader
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_POLL_BATCH_SIZE = 1000
 
-    def process_IN_CLOSE_WRITE(self, evt):
-        logger.debug(f"Clearing bundle due to changed file {evt.pathname}")
-        self.reloader.trigger_reload()
 
+class BaseWatcher:
+    """
+    Process wide watcher for FTL files, which dispatches changes to the
+    Reloader objects of all bundles.
 
-class Reloader:
-    def __init__(self, bundle):
-        self.bundle = bundle
+    Locale base directories are watched rather than just the files in use, so
+    that files and locale directories that are created later are also noticed.
+    """
+
+    def __init__(self):
+        self.reloaders = weakref.WeakSet()
+        # Directories containing locale directories, watched recursively.
+        self.base_dirs = set()
+
+    def subscribe(self, reloader):
+        self.reloaders.add(reloader)
+
+    def watch_base_dir(self, base_dir):
+        base_dir = os.path.abspath(base_dir)
+        if base_dir in self.base_dirs:
+            return
+        logger.debug(f"Observing {base_dir} for changes")
+        self.base_dirs.add(base_dir)
+        self.add_base_dir(base_dir)
+
+    def add_base_dir(self, base_dir):
+        raise NotImplementedError()
+
+    def watch_file(self, path):
+        raise NotImplementedError()
+
+    def file_changed(self, path):
+        if not path.endswith(".ftl"):
+            return
+        logger.debug(f"FTL file changed: {path}")
+        location = self.locale_and_path(path)
+        for reloader in list(self.reloaders):
+            reloader.file_changed(path, location)
+
+    def directory_created(self, path):
+        logger.debug(f"Directory created: {path}")
+        # Files may have been moved into place along with the directory.
+        for dirpath, dirnames, filenames in os.walk(path):
+            for filename in filenames:
+                self.file_changed(os.path.join(dirpath, filename))
+
+    def locale_and_path(self, path):
+        """
+        For a path within one of the base directories, returns the (normalized)
+        locale and the path relative to the locale directory, as used by
+        bundles. Returns None otherwise.
+        """
+        from .bundles import normalize_bcp47
+
+        base_dir = os.path.dirname(path)
+        parts = []
+        while base_dir not in self.base_dirs:
+            base_dir, part = os.path.split(base_dir)
+            if not part:
+                return None
+            parts.insert(0, part)
+        if len(parts) < 1:
+            return None
+        locale_dir = parts.pop(0)
+        return normalize_bcp47(locale_dir), "/".join(parts + [os.path.basename(path)])
+
+
+class InotifyWatcher(BaseWatcher):
+    """
+    Watcher using inotify (Linux only), checked for events at the start of
+    every request.
+    """
+
+    def __init__(self):
+        super().__init__()
+        if pyinotify is None:
+            raise ImproperlyConfigured(
+                "The 'inotify' AUTO_RELOAD_BACKEND requires pyinotify to be installed"
+            )
+        self.mask = (
+            pyinotify.IN_CLOSE_WRITE
+            | pyinotify.IN_MOVED_TO
+            # Needed for auto_add of new directories
+            | pyinotify.IN_CREATE
+        )
         self.wm = pyinotify.WatchManager()
-        self.watches = {}
-        self.handler = BundleModifiedHandler(reloader=self)
         # ThreadedNotifier seems to give us horrible problems with Django's
         # devserver when it comes to auto reloading. So we use a Notifier and
-        # run the checks for every new request.
-        logger.debug(f"Creating notifier for {bundle}")
-        self.notifier = pyinotify.Notifier(self.wm, self.handler, timeout=100)
-        django_signals.request_started.connect(self.new_request)
+        # run the checks for every new request. Events are queued by the kernel
+        # as soon as a file is written, so there is no need to wait for them.
+        self.notifier = pyinotify.Notifier(self.wm, self.process_event, timeout=0)
+        self._lock = threading.Lock()
+        django_signals.request_started.connect(self.new_request, weak=False)
+
+    def add_base_dir(self, base_dir):
+        self.wm.add_watch(base_dir, self.mask, rec=True, auto_add=True)
+
+    def watch_file(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        if self.wm.get_wd(directory) is None:
+            logger.debug(f"Observing {directory} for changes")
+            self.wm.add_watch(directory, self.mask)
 
     def new_request(self, sender, **kwargs):
+        # Requests can be handled in multiple threads, but only one needs to
+        # check for changes.
+        if not self._lock.acquire(blocking=False):
+            return
         try:
             self.notifier.process_events()
             while (
@@ -40,16 +145,246 @@ class Reloader:
             # Sometimes get:
             #  RuntimeError: concurrent poll() invocation
             pass
+        finally:
+            self._lock.release()
+
+    def process_event(self, evt):
+        if evt.mask & (pyinotify.IN_CREATE | pyinotify.IN_MOVED_TO) and evt.dir:
+            self.directory_created(evt.pathname)
+        elif evt.mask & (pyinotify.IN_CLOSE_WRITE | pyinotify.IN_MOVED_TO):
+            # New files created in place are handled by IN_CLOSE_WRITE once
+            # they have been written, and editors often save by writing a new
+            # file and renaming it, giving IN_MOVED_TO.
+            self.file_changed(evt.pathname)
+
+
+class StatWatcher(BaseWatcher):
+    """
+    Watcher that polls file modification times and sizes, for platforms and
+    file systems where inotify is not available.
+
+    Checks are done at the start of requests, at most once every `interval`
+    seconds, and each check looks at no more than `batch_size` files and
+    directories, so that the overhead is bounded however many files there are.
+    Directories are listed to find new files.
+    """
+
+    def __init__(self, interval=None, batch_size=None):
+        super().__init__()
+        if interval is None:
+            interval = get_setting("AUTO_RELOAD_POLL_INTERVAL", DEFAULT_POLL_INTERVAL)
+        if batch_size is None:
+            batch_size = get_setting(
+                "AUTO_RELOAD_POLL_BATCH_SIZE", DEFAULT_POLL_BATCH_SIZE
+            )
+        self.interval = interval
+        self.batch_size = max(batch_size, 1)
+        # path -> stat signature, for files being polled.
+        self.signatures = {}
+        # Directory -> set of entries, used to find new entries.
+        self.dir_entries = {}
+        # Polling order, and where the next batch starts.
+        self.paths = []
+        self.next_index = 0
+        self.last_check = time.monotonic()
+        self._lock = threading.Lock()
+        django_signals.request_started.connect(self.new_request, weak=False)
+
+    def add_base_dir(self, base_dir):
+        for dirpath, dirnames, filenames in os.walk(base_dir):
+            self.add_path(dirpath)
+
+    def watch_file(self, path):
+        self.add_path(os.path.abspath(path))
+
+    def add_path(self, path):
+        if path in self.signatures or path in self.dir_entries:
+            return
+        if os.path.isdir(path):
+            self.dir_entries[path] = set(self.list_dir(path))
+        else:
+            self.signatures[path] = self.signature(path)
+        self.paths.append(path)
+
+    def new_request(self, sender, **kwargs):
+        if time.monotonic() - self.last_check < self.interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self.check()
+        finally:
+            self.last_check = time.monotonic()
+            self._lock.release()
+
+    def check(self):
+        """
+        Polls the next batch of files and directories.
+        """
+        paths = self.paths
+        if not paths:
+            return
+        count = len(paths)
+        start = self.next_index % count
+        batch = [paths[(start + i) % count] for i in range(min(self.batch_size, count))]
+        self.next_index = (start + len(batch)) % count
+        for path in batch:
+            if path in self.dir_entries:
+                # Directory modification times can miss changes made in quick
+                # succession, so we compare the contents instead.
+                self.check_dir(path)
+                continue
+            signature = self.signature(path)
+            if signature == self.signatures[path]:
+                continue
+            self.signatures[path] = signature
+            if signature is not None:
+                self.file_changed(path)
+
+    def check_dir(self, path):
+        old_entries = self.dir_entries[path]
+        new_entries = set(self.list_dir(path))
+        self.dir_entries[path] = new_entries
+        for name in sorted(new_entries - old_entries):
+            entry_path = os.path.join(path, name)
+            if os.path.isdir(entry_path):
+                self.add_base_dir(entry_path)
+                self.directory_created(entry_path)
+            elif name.endswith(".ftl"):
+                # New file. If something is using it, it will be added to the
+                # polled files by `watch_file` when it is loaded.
+                self.file_changed(entry_path)
+
+    def signature(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def list_dir(self, path):
+        try:
+            return os.listdir(path)
+        except OSError:
+            return []
+
+
+class DjangoWatcher(BaseWatcher):
+    """
+    Watcher that uses Django's own autoreloader (as used by ``runserver``),
+    e.g. StatReloader or WatchmanReloader. Changes to FTL files are handled
+    without restarting the server.
+    """
+
+    def __init__(self):
+        super().__init__()
+        try:
+            from django.utils.autoreload import autoreload_started, file_changed
+        except ImportError:
+            raise ImproperlyConfigured(
+                "The 'django' AUTO_RELOAD_BACKEND requires Django 2.2 or later"
+            )
+        self.django_reloader = None
+        autoreload_started.connect(self.autoreload_started, weak=False)
+        file_changed.connect(self.django_file_changed, weak=False)
+
+    def autoreload_started(self, sender, **kwargs):
+        self.django_reloader = sender
+        for base_dir in self.base_dirs:
+            self.add_base_dir(base_dir)
+
+    def add_base_dir(self, base_dir):
+        if self.django_reloader is not None:
+            self.django_reloader.watch_dir(base_dir, "**/*.ftl")
+
+    def watch_file(self, path):
+        # Files are in base dirs, which are watched already.
+        pass
+
+    def django_file_changed(self, sender, file_path, **kwargs):
+        path = str(file_path)
+        if not path.endswith(".ftl"):
+            return None
+        self.file_changed(path)
+        # Stops Django restarting the server
+        return True
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(backend=None):
+    """
+    Returns the process wide watcher for the given backend, defaulting to the
+    AUTO_RELOAD_BACKEND setting.
+    """
+    if backend is None:
+        backend = get_setting("AUTO_RELOAD_BACKEND", BACKEND_AUTO)
+    if backend == BACKEND_AUTO:
+        backend = BACKEND_STAT if pyinotify is None else BACKEND_INOTIFY
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(
+            f"AUTO_RELOAD_BACKEND '{backend}' not understood, must be one of {BACKENDS}"
+        )
+    with _watchers_lock:
+        try:
+            return _watchers[backend]
+        except KeyError:
+            logger.debug(f"Creating FTL file watcher using {backend}")
+            watcher = _watchers[backend] = {
+                BACKEND_INOTIFY: InotifyWatcher,
+                BACKEND_STAT: StatWatcher,
+                BACKEND_DJANGO: DjangoWatcher,
+            }[backend]()
+            return watcher
+
+
+class Reloader:
+    def __init__(self, bundle, watcher):
+        self.bundle = bundle
+        self.watcher = watcher
+        # path -> set of locales the file was loaded for
+        self.locales_for_path = {}
+        watcher.subscribe(self)
+
+    def add_watched_path(self, path, locale=None):
+        path = os.path.abspath(path)
+        self.watcher.watch_file(path)
+        self.locales_for_path.setdefault(path, set()).add(locale)
+
+    def add_watched_base_dirs(self, base_dirs):
+        for base_dir in base_dirs:
+            if os.path.isdir(base_dir):
+                self.watcher.watch_base_dir(base_dir)
+
+    def file_changed(self, path, location=None):
+        if path in self.locales_for_path:
+            self.trigger_reload(path)
+            return
+        # A file we didn't have before.
+        finder_invalidate = getattr(self.bundle._finder, "invalidate", None)
+        if finder_invalidate is not None:
+            finder_invalidate()
+        if location is not None and location[1] in self.bundle._paths:
+            logger.debug(f"Reloading {self.bundle} due to new file {path}")
+            self.bundle.reload_locale(location[0])
 
-    def add_watched_path(self, path):
-        logger.debug(f"Observing {path} for changes")
-        self.watches.update(self.wm.add_watch(path, pyinotify.IN_CLOSE_WRITE))
+    def trigger_reload(self, path=None):
+        logger.debug(f"Reloading {self.bundle} due to changed file {path}")
+        locales = self.locales_for_path.pop(path, None)
+        if not locales or None in locales:
+            # We don't know what was affected, reload everything. The Bundle
+            # will add paths again after a reload.
+            self.locales_for_path = {}
+            self.bundle.reload()
+            return
 
-    def trigger_reload(self):
-        # Remove watches, because the Bundle will add them again after a reload.
-        self.wm.rm_watch(list(self.watches.values()))
-        self.bundle.reload()
+        # Only the locales using the file need to be reloaded, and only the file
+        # is read again, which will add it again.
+        for locale in locales:
+            self.bundle.reload_locale(locale, filename=path)
 
 
 def create_bundle_reloader(bundle):
-    return Reloader(bundle)
+    return Reloader(bundle, get_watcher())
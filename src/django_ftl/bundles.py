@@ -1,17 +1,26 @@
+import gc
 import logging
 import os
-from collections import OrderedDict
-from threading import Lock, local
-
-from babel.core import UnknownLocaleError
+import time
+import weakref
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from itertools import count
+from threading import Lock
+
+from babel.core import Locale, UnknownLocaleError
 from django.conf import settings
 from django.utils.functional import cached_property, lazy
 from django.utils.html import conditional_escape as conditional_html_escape
 from django.utils.html import mark_safe as mark_html_escaped
-from fluent_compiler.compiler import compile_messages
+from django.utils.module_loading import autodiscover_modules, import_string
 from fluent_compiler.resource import FtlResource
 
+from .compilation import CompiledUnit, compile_code, lazy_compile_unit, load_code
 from .conf import get_setting
+from .error_reporting import create_error_reporter, ftl_logger  # noqa: F401
 from .utils import make_namespace
 
 try:
@@ -26,9 +35,15 @@ except ImportError:
     from django.utils.html import SafeString
 
 
-_active_locale = local()
+logger = logging.getLogger(__name__)
+
+# A ContextVar works for threads (each thread has its own context) and also
+# for asyncio tasks running concurrently in the same thread.
+_active_locale = ContextVar("django_ftl_active_locale", default=None)
 
-ftl_logger = logging.getLogger("django_ftl.message_errors")
+# Registry of all Bundle objects, in order of creation.
+_bundle_registry = weakref.WeakValueDictionary()
+_bundle_counter = count()
 
 
 class NoLocaleSet(AssertionError):
@@ -53,46 +68,119 @@ class FileNotFoundError(RuntimeError):
 
 
 class MessageFinderBase:
+    """
+    Finds FTL files in locale directories inside `locale_base_dirs`. Earlier
+    base directories take priority over later ones.
+
+    All the files are found in a single scan of the directories, which is done
+    the first time it is needed, and again after `invalidate` is called.
+    """
+
+    _index = None
+
     @property
     def locale_base_dirs(self):
         raise NotImplementedError()
 
     def load(self, locale, path, reloader=None):
         locale = normalize_bcp47(locale)
-        all_bases = self.locale_base_dirs
+        if reloader is not None:
+            reloader.add_watched_base_dirs(self.locale_base_dirs)
+        full_path = self.index.get((locale, path))
+        if full_path is not None and not os.path.exists(full_path):
+            # Removed since the index was built.
+            self.invalidate()
+            full_path = self.index.get((locale, path))
+        if full_path is None:
+            raise FileNotFoundError(
+                f"Could not find locate FTL file {locale}/{path}. Tried: {', '.join(self._tried(locale, path))}"
+            )
+        if reloader is not None:
+            reloader.add_watched_path(full_path, locale)
+        return FtlResource.from_file(full_path)
+
+    @property
+    def index(self):
+        """
+        Dictionary of (normalized locale, relative path) to full path of a file.
+        """
+        index = self._index
+        if index is None:
+            index = self._index = self.build_index()
+        return index
+
+    def build_index(self):
+        index = {}
+        for base in self.locale_base_dirs:
+            for locale, locale_dir in _locale_dirs_at_path(base).items():
+                for relative_path, full_path in _scan_files(locale_dir):
+                    index.setdefault((locale, relative_path), full_path)
+        return index
+
+    def invalidate(self):
+        """
+        Discards the index of files, so that added or removed files are found.
+        """
+        self._index = None
+
+    def available_locales(self):
+        """
+        Returns a set of the (normalized) locales that have any files.
+        """
+        return {locale for locale, path in self.index}
+
+    def _tried(self, locale, path):
         tried = []
-        for i, base in enumerate(all_bases):
-            try:
-                locale_dir = locale_dirs_at_path(base)[locale]
-            except KeyError:
+        for base in self.locale_base_dirs:
+            locale_dir = _locale_dirs_at_path(base).get(locale)
+            if locale_dir is None:
                 tried.append(base + "/")
-                continue
-
-            full_path = os.path.join(locale_dir, path)
-            if os.path.exists(full_path):
-                if reloader is not None:
-                    reloader.add_watched_path(full_path)
-                return FtlResource.from_file(full_path)
             else:
-                tried.append(full_path)
-
-        raise FileNotFoundError(
-            f"Could not find locate FTL file {locale}/{path}. Tried: {', '.join(tried)}"
-        )
+                tried.append(os.path.join(locale_dir, path))
+        return tried
+
+
+def _locale_dirs_at_path(base):
+    # Mapping from normalized locale name to directory.
+    try:
+        entries = list(os.scandir(base))
+    except OSError:
+        return {}
+    return {
+        normalize_bcp47(entry.name): entry.path for entry in entries if entry.is_dir()
+    }
+
+
+def _scan_files(directory, prefix="", parents=frozenset()):
+    # Yields (relative path with '/' separators, full path) for all files in
+    # `directory` and its subdirectories. Symlinked directories are followed,
+    # except those that link back to a parent directory.
+    real_path = os.path.realpath(directory)
+    if real_path in parents:
+        return
+    parents = parents | {real_path}
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir():
+            yield from _scan_files(entry.path, prefix + entry.name + "/", parents)
+        elif entry.is_file():
+            yield prefix + entry.name, entry.path
 
 
 def normalize_bcp47(locale):
     return locale.lower().replace("_", "-")
 
 
-@lru_cache(maxsize=None)
-def locale_dirs_at_path(base):
-    dirs_found = [
-        p for p in [os.path.join(base, e) for e in os.listdir(base)] if os.path.isdir(p)
-    ]
-
-    # Apply normalization and return mapping from locale nane to directory.
-    return {normalize_bcp47(os.path.basename(p)): p for p in dirs_found}
+@lru_cache(maxsize=1000)
+def normalize_locale(locale):
+    """
+    Normalizes a locale, or a comma separated language priority list, so that
+    different spellings of the same value compare equal.
+    """
+    return ",".join(normalize_bcp47(l.strip()) for l in locale.split(","))
 
 
 class DjangoMessageFinder(MessageFinderBase):
@@ -102,20 +190,65 @@ class DjangoMessageFinder(MessageFinderBase):
 
 
 default_finder = DjangoMessageFinder()
+_finders_from_settings = {}
+
+
+def get_default_finder():
+    """
+    Returns the finder used by bundles that don't specify one, which is an
+    instance of the class named by the FINDER setting, or `default_finder`.
+    """
+    finder_class = get_setting("FINDER", None)
+    if finder_class is None:
+        return default_finder
+    try:
+        return _finders_from_settings[finder_class]
+    except KeyError:
+        finder = _finders_from_settings[finder_class] = import_string(finder_class)()
+        return finder
+
+
+# Normalized locale (as passed to `activate`) -> when it was last activated,
+# used to find least recently used compiled units, see `max_compiled_locales`.
+# Kept in order of activation, oldest first.
+_last_activated = {}
+_activation_counter = count()
+
+
+def _record_activation(locale):
+    # Moved to the end, so that the oldest entries are the first ones.
+    _last_activated.pop(locale, None)
+    if len(_last_activated) >= MAX_LOCALES_CACHED:
+        try:
+            del _last_activated[next(iter(_last_activated))]
+        except (KeyError, RuntimeError, StopIteration):
+            # Changed by another thread.
+            pass
+    _last_activated[locale] = next(_activation_counter)
 
 
 class LanguageActivator:
+    # Set when a bundle using `max_compiled_locales` is created, so that there
+    # is no overhead otherwise.
+    track_activations = False
+
     def activate(self, locale):
+        if locale is not None:
+            # Bundles use the value as a cache key, so it is normalized here,
+            # outside the hot path of Bundle.format
+            locale = normalize_locale(locale)
+            if self.track_activations:
+                _record_activation(locale)
         old_value = self.get_current_value()
         if old_value == locale:
             return
-        _active_locale.value = locale
+        _active_locale.set(locale)
 
     def deactivate(self):
         self.activate(None)
 
     def get_current_value(self):
-        return getattr(_active_locale, "value", None)
+        return _active_locale.get()
 
 
 activator = LanguageActivator()
@@ -134,6 +267,40 @@ html_escaper = make_namespace(
 )
 
 
+DEFAULT_MESSAGE_CACHE_SIZE = 10000
+MESSAGE_CACHE_POLICY_LRU = "lru"
+MESSAGE_CACHE_POLICY_FIFO = "fifo"
+MESSAGE_CACHE_POLICIES = [MESSAGE_CACHE_POLICY_LRU, MESSAGE_CACHE_POLICY_FIFO]
+ResultCacheInfo = namedtuple(
+    "ResultCacheInfo", ["hits", "misses", "maxsize", "currsize"]
+)
+
+# Limit for caches keyed on locale, which could otherwise be filled by
+# arbitrary user input.
+MAX_LOCALES_CACHED = 1000
+
+
+# Argument types for which equal values always produce the same output. Others,
+# such as datetimes (equal across timezones) or model instances (equal by pk),
+# can't be used in result cache keys.
+_RESULT_CACHE_ARG_TYPES = frozenset([str, int, bool, type(None)])
+
+
+def _result_cache_key(current_locale, message_id, args):
+    if not args:
+        return (current_locale, message_id, None)
+    arg_types = _RESULT_CACHE_ARG_TYPES
+    for value in args.values():
+        if type(value) not in arg_types:
+            return None
+    # Include types, because 1 and True compare equal but format differently.
+    return (
+        current_locale,
+        message_id,
+        frozenset((k, type(v), v) for k, v in args.items()),
+    )
+
+
 class Bundle:
     def __init__(
         self,
@@ -142,31 +309,101 @@ class Bundle:
         use_isolating=True,
         require_activate=False,
         auto_reload=None,
-        finder=default_finder,
+        finder=None,
         functions=None,
+        compiled_cache_dir=None,
+        compiled_modules_package=None,
+        message_cache_size=None,
+        message_cache_policy=None,
+        result_cache_size=None,
+        lazy_compile=None,
+        max_compiled_locales=None,
+        pinned_locales=None,
+        collect_stats=None,
     ):
 
         self._paths = paths
+        if finder is None:
+            finder = get_default_finder()
         self._finder = finder
         self._default_locale = default_locale
         self._use_isolating = use_isolating
         self._require_activate = require_activate
+        # _lock protects the bookkeeping of locks and caches, _locale_locks
+        # are held while a locale is being compiled.
         self._lock = Lock()
+        self._locale_locks = {}
         self._functions = functions or {}
 
+        if message_cache_size is None:
+            message_cache_size = get_setting(
+                "MESSAGE_CACHE_SIZE", DEFAULT_MESSAGE_CACHE_SIZE
+            )
+        if message_cache_policy is None:
+            message_cache_policy = get_setting(
+                "MESSAGE_CACHE_POLICY", MESSAGE_CACHE_POLICY_LRU
+            )
+        if message_cache_policy not in MESSAGE_CACHE_POLICIES:
+            raise ValueError(
+                f"message_cache_policy '{message_cache_policy}' not understood, must be one of {MESSAGE_CACHE_POLICIES}"
+            )
+        self._message_cache_size = message_cache_size
+        self._message_cache_policy = message_cache_policy
+
+        if result_cache_size is None:
+            result_cache_size = get_setting("RESULT_CACHE_SIZE", 0)
+        self._result_cache_size = result_cache_size
+        self._result_cache_hits = 0
+        self._result_cache_misses = 0
+
+        if compiled_cache_dir is None:
+            compiled_cache_dir = get_setting("COMPILED_CACHE_DIR", None)
+        if compiled_cache_dir:
+            from .compiled_cache import CompiledCache
+
+            self._compiled_cache = CompiledCache(compiled_cache_dir)
+        else:
+            self._compiled_cache = None
+
+        if compiled_modules_package is None:
+            compiled_modules_package = get_setting("COMPILED_MODULES_PACKAGE", None)
+        self._compiled_modules_package = compiled_modules_package
+
+        if lazy_compile is None:
+            lazy_compile = get_setting("LAZY_COMPILE", False)
+        self._lazy_compile = lazy_compile
+
+        if max_compiled_locales is None:
+            max_compiled_locales = get_setting("MAX_COMPILED_LOCALES", None)
+        if pinned_locales is None:
+            pinned_locales = get_setting("PINNED_LOCALES", [])
+        self._max_compiled_locales = max_compiled_locales
+        self._pinned_locales = {normalize_bcp47(l) for l in pinned_locales}
+        if max_compiled_locales is not None:
+            activator.track_activations = True
+
+        self._error_reporter = create_error_reporter()
+
+        if collect_stats is None:
+            collect_stats = get_setting("COLLECT_STATS", False)
+        if collect_stats:
+            from .stats import BundleStats
+
+            self._stats = BundleStats(
+                latency_sample_interval=get_setting("STATS_LATENCY_SAMPLE_INTERVAL", 0)
+            )
+            # Replaces the method for this instance only, so that bundles not
+            # collecting stats have no overhead at all.
+            self._unwrapped_format = self.format
+            self.format = self._format_with_stats
+        else:
+            self._stats = None
+
         if auto_reload is None:
             auto_reload = get_setting("AUTO_RELOAD_BUNDLES", None)
 
         if auto_reload is None:
-            if settings.DEBUG:
-                try:
-                    import pyinotify  # noqa
-                except ImportError:
-                    ftl_logger.warning(
-                        "Not using django_ftl autoreloader because pyinotify is not installed. Set `Bundle.auto_reload` or `AUTO_RELOAD_BUNDLES` to `False` to disable this warning."
-                    )
-                else:
-                    auto_reload = True
+            auto_reload = settings.DEBUG
 
         if auto_reload:
             # import at this point to avoid importing pyinotify if we don't need it.
@@ -175,46 +412,359 @@ class Bundle:
             self._reloader = create_bundle_reloader(self)
         else:
             self._reloader = None
-        self.reload()
+        # Incremented on every reload, so that caches outside the bundle (e.g.
+        # in template nodes) can tell when their entries are stale.
+        self._generation = 0
+        with self._lock:
+            self._reset({})
+        _bundle_registry[next(_bundle_counter)] = self
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._paths!r}>"
 
     def reload(self):
+        finder_invalidate = getattr(self._finder, "invalidate", None)
+        if finder_invalidate is not None:
+            finder_invalidate()
+        with self._lock:
+            self._reset({})
+
+    def hot_reload(self, locales=None):
+        """
+        Loads and compiles the FTL files again for the given locales (defaulting
+        to the locales that have already been compiled), while the current
+        compiled units continue to be used. The new units then replace the old
+        ones in a single step, so there is no point at which messages are
+        missing or have to be compiled on demand.
+        """
+        if locales is None:
+            locales = list(self._compiled_unit_for_locale)
+        finder_invalidate = getattr(self._finder, "invalidate", None)
+        if finder_invalidate is not None:
+            finder_invalidate()
+        new_units = {}
+        for locale in uniquify(normalize_bcp47(l) for l in locales):
+            unit = self._compile(locale, self._load_resources(locale, reuse=False))
+            self._add_compiled_unit(new_units, locale, unit)
+        with self._lock:
+            self._reset(new_units)
+
+    def _reset(self, compiled_units):
+        # Must be called with self._lock held
+        self._generation += 1
+        self._message_function_cache = {}
+        self._previous_message_function_cache = {}
+        self._compiled_unit_for_locale = compiled_units
+        self._available_units_for_locale = {}
+        self._unavailable_locales = set()
+        # (locale, message_id, args snapshot) -> output, or None if disabled
+        self._result_cache = {} if self._result_cache_size else None
+        # (locale, path) -> FtlResource, kept only if we are auto reloading
+        self._resources = {}
+
+    def reload_locale(self, locale, filename=None):
+        """
+        Discards the compiled FTL for a single locale, and cached messages that
+        came from it, so that only this locale is loaded and compiled again when
+        it is next needed. If `filename` is passed, only that file is read
+        again, and files that haven't changed are reused.
+        """
+        locale = normalize_bcp47(locale)
+        affected = {}
+
+        def is_affected(current_locale):
+            try:
+                return affected[current_locale]
+            except KeyError:
+                result = affected[current_locale] = locale in self._locales_to_try(
+                    current_locale
+                )
+                return result
+
         with self._lock:
-            self._message_function_cache = {}
-            self._compiled_unit_for_locale = {}
+            self._generation += 1
+            # New dictionaries are created rather than modified in place, so
+            # that results from compilations already in progress, which may
+            # have used the old files, are discarded (see
+            # get_compiled_unit_for_locale).
+            self._resources = {
+                key: resource
+                for key, resource in self._resources.items()
+                if key[0] != locale
+                or (
+                    filename is not None
+                    and os.path.abspath(resource.filename) != os.path.abspath(filename)
+                )
+            }
+            self._compiled_unit_for_locale = {
+                l: unit
+                for l, unit in self._compiled_unit_for_locale.items()
+                if l != locale
+            }
+            self._unavailable_locales = self._unavailable_locales - {locale}
+            self._discard_cached_for(is_affected)
+
+    def _discard_cached_for(self, is_affected):
+        # Must be called with self._lock held. Removes cached entries for the
+        # active locales for which `is_affected(current_locale)` is true.
+        self._available_units_for_locale = {
+            l: units
+            for l, units in self._available_units_for_locale.items()
+            if not is_affected(l)
+        }
+        self._message_function_cache = {
+            key: func
+            for key, func in self._message_function_cache.items()
+            if not is_affected(key[0])
+        }
+        self._previous_message_function_cache = {
+            key: func
+            for key, func in self._previous_message_function_cache.items()
+            if not is_affected(key[0])
+        }
+        if self._result_cache is not None:
+            self._result_cache = {
+                key: value
+                for key, value in self._result_cache.items()
+                if not is_affected(key[0])
+            }
 
     def _get_default_locale(self):
         default_locale = self._default_locale
-        if default_locale is not None:
-            return default_locale
-
-        return get_setting("LANGUAGE_CODE")
+        if default_locale is None:
+            default_locale = get_setting("LANGUAGE_CODE")
+        if default_locale is None:
+            return None
+        return normalize_bcp47(default_locale)
 
     def get_compiled_unit_for_locale_list(self, locales):
+        default_locale = self._get_default_locale()
         for locale in locales:
-            try:
-                unit = self.get_compiled_unit_for_locale(locale)
-            except UnknownLocaleError:
+            if locale in self._unavailable_locales:
                 continue
-            yield unit
+            if (
+                locale != default_locale
+                and locale not in self._compiled_unit_for_locale
+            ):
+                try:
+                    Locale.parse(locale.replace("-", "_"))
+                except (UnknownLocaleError, ValueError) as e:
+                    # ValueError is raised by babel for invalid identifiers.
+                    logger.warning(f"Skipping locale {locale!r} for {self!r}: {e!r}")
+                    self._mark_unavailable(locale)
+                    continue
+            yield self.get_compiled_unit_for_locale(locale)
+
+    def _get_available_units(self, current_locale):
+        """
+        Returns the compiled units that should be tried, in order, when
+        `current_locale` is active.
+        """
+        try:
+            return self._available_units_for_locale[current_locale]
+        except KeyError:
+            pass
+
+        units = []
+        for unit in self.get_compiled_unit_for_locale_list(
+            self._locales_to_try(current_locale)
+        ):
+            if unit.message_functions:
+                units.append(unit)
+            else:
+                # No FTL files for this locale, no point looking in it again.
+                self._mark_unavailable(unit.locale)
+        units = tuple(units)
+
+        available_units = self._available_units_for_locale
+        if len(available_units) >= MAX_LOCALES_CACHED:
+            available_units.clear()
+        available_units[current_locale] = units
+        return units
+
+    def _locales_to_try(self, current_locale):
+        locale_to_use = current_locale or self._get_default_locale()
+        to_try = list(locale_lookups(locale_to_use))
+        default_locale = self._get_default_locale()
+        if default_locale is not None:
+            to_try = uniquify(to_try + [default_locale])
+        return to_try
+
+    def _mark_unavailable(self, locale):
+        if len(self._unavailable_locales) >= MAX_LOCALES_CACHED:
+            self._unavailable_locales.clear()
+        self._unavailable_locales.add(locale)
 
     def get_compiled_unit_for_locale(self, locale):
+        locale = normalize_bcp47(locale)
         try:
             return self._compiled_unit_for_locale[locale]
         except KeyError:
             pass
 
-        # Fill out _compiled_unit_for_locale
-        # necessary, but do this synchronized for all threads.
-        with self._lock:
-            # Double checked locking pattern.
+        # Fill out _compiled_unit_for_locale if necessary, but do this
+        # synchronized for all threads that need the same locale. Threads that
+        # need other locales don't have to wait.
+        with self._locale_lock(locale):
+            # Double checked locking pattern. We store the result in the dict
+            # we checked, so that if `reload()` is called while we are
+            # compiling, our (possibly outdated) result is discarded.
+            compiled_units = self._compiled_unit_for_locale
             try:
-                return self._compiled_unit_for_locale[locale]
+                return compiled_units[locale]
             except KeyError:
                 pass
 
             # Do the compilation:
-            resources = []
-            for path in self._paths:
+            unit = self._compile(locale, self._load_resources(locale))
+            self._add_compiled_unit(compiled_units, locale, unit)
+            self._evict_compiled_units(compiled_units, locale)
+            return unit
+
+    def _add_compiled_unit(self, compiled_units, locale, unit):
+        for msg_id, error in unit.errors:
+            self._log_error(locale, msg_id, {}, error)
+        compiled_units[locale] = unit
+
+    def _evict_compiled_units(self, compiled_units, new_locale):
+        # Keeps the number of compiled locales within `max_compiled_locales`,
+        # evicting those that were least recently activated. Locales with no
+        # FTL files go first, since they are cheap to compile again.
+        max_locales = self._max_compiled_locales
+        if max_locales is None or len(compiled_units) <= max_locales:
+            return
+        keep = self._pinned_locales | {self._get_default_locale()}
+        if compiled_units[new_locale].message_functions:
+            keep.add(new_locale)
+        with self._lock:
+            if compiled_units is not self._compiled_unit_for_locale:
+                # Reloaded in the meantime.
+                return
+            candidates = [l for l in compiled_units if l not in keep]
+            excess = len(compiled_units) - max_locales
+            if excess <= 0 or not candidates:
+                return
+            last_used = self._last_activated(candidates)
+            candidates.sort(
+                key=lambda l: (bool(compiled_units[l].message_functions), last_used[l])
+            )
+            evicted = set(candidates[:excess])
+            # Modified in place, so that results of compilations in progress
+            # for other locales are kept.
+            for locale in evicted:
+                del compiled_units[locale]
+            self._discard_cached_for(
+                lambda current_locale: not evicted.isdisjoint(
+                    self._locales_to_try(current_locale)
+                )
+            )
+
+    def _last_activated(self, locales):
+        # Returns a dictionary of locale to when it was last used, as found
+        # from when locales that use it were activated.
+        last_used = dict.fromkeys(locales, -1)
+        for activated, when in list(_last_activated.items()):
+            for locale in self._locales_to_try(activated):
+                if locale in last_used and last_used[locale] < when:
+                    last_used[locale] = when
+        return last_used
+
+    def compile_locales(self, locales, executor=None):
+        """
+        Load and compile the FTL files for a list of locales, returning a
+        dictionary of locale to compiled unit.
+
+        If `executor` (a ``concurrent.futures.Executor``) is passed, locales are
+        parsed and compiled concurrently using it. With a
+        ``ProcessPoolExecutor``, any custom functions of the bundle must be
+        picklable.
+        """
+        return dict(self._compile_locales(locales, executor=executor))
+
+    def _compile_locales(self, locales, executor=None):
+        # Generator yielding (locale, unit) as each locale is done.
+        locales = uniquify(normalize_bcp47(l) for l in locales)
+        if executor is None or self._lazy_compile:
+            # Lazy compilation only parses the files, which isn't worth
+            # sending to an executor.
+            for locale in locales:
+                yield locale, self.get_compiled_unit_for_locale(locale)
+            return
+
+        with ExitStack() as stack:
+            # Hold the locks for all the locales, so that other threads wait for
+            # our results instead of compiling the same locales. Locks are
+            # always acquired in the same order, to avoid deadlocks.
+            for locale in sorted(locales):
+                stack.enter_context(self._locale_lock(locale))
+            compiled_units = self._compiled_unit_for_locale
+            pending = []
+            for locale in locales:
+                unit = compiled_units.get(locale)
+                if unit is not None:
+                    # Kept here, since it might be evicted while compiling the
+                    # other locales.
+                    pending.append((locale, unit, None, None))
+                    continue
+                resources = self._load_resources(locale)
+                compiled_code = self._load_compiled_module(locale, resources)
+                if compiled_code is None:
+                    compiled_code = self._get_cached_code(locale, resources)
+                if compiled_code is None:
+                    compiled_code = executor.submit(
+                        _compile_code_for_bundle,
+                        locale,
+                        resources,
+                        self._use_isolating,
+                        self._functions,
+                    )
+                pending.append((locale, None, resources, compiled_code))
+
+            for locale, unit, resources, compiled_code in pending:
+                if unit is not None:
+                    yield locale, unit
+                    continue
+                start = time.perf_counter()
+                if isinstance(compiled_code, CompiledUnit):
+                    # From a compiled module
+                    unit = compiled_code
+                else:
+                    if isinstance(compiled_code, Future):
+                        compiled_code = compiled_code.result()
+                        self._set_cached_code(locale, resources, compiled_code)
+                    unit = load_code(compiled_code, **self._compile_options())
+                if self._stats is not None:
+                    # Only the time we waited for, the rest was concurrent.
+                    self._stats.record_compile(
+                        locale, time.perf_counter() - start, len(unit.message_functions)
+                    )
+                self._add_compiled_unit(compiled_units, locale, unit)
+                self._evict_compiled_units(compiled_units, locale)
+                yield locale, unit
+
+    @contextmanager
+    def _locale_lock(self, locale):
+        with self._lock:
+            try:
+                lock = self._locale_locks[locale]
+            except KeyError:
+                lock = self._locale_locks[locale] = Lock()
+        try:
+            with lock:
+                yield
+        finally:
+            # Remove the lock once it's no longer needed, so that we don't
+            # accumulate locks for every locale ever requested. Threads still
+            # waiting on it will find the compiled unit after acquiring it.
+            with self._lock:
+                if self._locale_locks.get(locale) is lock:
+                    del self._locale_locks[locale]
+
+    def _load_resources(self, locale, reuse=True):
+        resources = []
+        for path in self._paths:
+            resource = self._resources.get((locale, path)) if reuse else None
+            if resource is None:
                 try:
                     resource = self._finder.load(locale, path, reloader=self._reloader)
                 except FileNotFoundError:
@@ -223,21 +773,77 @@ class Bundle:
                         # want to bail early and alert developer.
                         raise
                     # Allow missing files otherwise
-                else:
-                    resources.append(resource)
+                    continue
+                if self._reloader is not None:
+                    # Kept so that `reload_locale` only has to read changed files.
+                    self._resources[locale, path] = resource
+            resources.append(resource)
+        return resources
+
+    def _compile_options(self):
+        return dict(
+            use_isolating=self._use_isolating,
+            functions=self._functions,
+            escapers=[html_escaper],
+        )
 
-            unit = compile_messages(
-                locale,
-                resources,
-                use_isolating=self._use_isolating,
-                escapers=[html_escaper],
-                functions=self._functions,
-            )
-            errors = unit.errors
-            for msg_id, error in errors:
-                self._log_error(locale, msg_id, {}, error)
-            self._compiled_unit_for_locale[locale] = unit
+    def _compile(self, locale, resources):
+        if self._stats is None:
+            return self._compile_unit(locale, resources)
+        start = time.perf_counter()
+        unit = self._compile_unit(locale, resources)
+        self._stats.record_compile(
+            locale, time.perf_counter() - start, len(unit.message_functions)
+        )
+        return unit
+
+    def _compile_unit(self, locale, resources):
+        unit = self._load_compiled_module(locale, resources)
+        if unit is not None:
             return unit
+        if self._lazy_compile:
+            return lazy_compile_unit(locale, resources, **self._compile_options())
+        compiled_code = self._get_cached_code(locale, resources)
+        if compiled_code is None:
+            compiled_code = compile_code(locale, resources, **self._compile_options())
+            self._set_cached_code(locale, resources, compiled_code)
+        return load_code(compiled_code, **self._compile_options())
+
+    def _compiled_module_name(self, locale):
+        from .compiled_modules import module_name
+
+        return module_name(self._paths, locale, self._compile_options())
+
+    def _load_compiled_module(self, locale, resources):
+        if not self._compiled_modules_package:
+            return None
+        from .compiled_modules import load_module
+
+        return load_module(
+            self._compiled_modules_package,
+            self._compiled_module_name(locale),
+            locale,
+            resources,
+            self._compile_options(),
+        )
+
+    def _get_cached_code(self, locale, resources):
+        if self._compiled_cache is None:
+            return None
+        return self._compiled_cache.get(*self._cache_key(locale, resources))
+
+    def _set_cached_code(self, locale, resources, compiled_code):
+        if self._compiled_cache is None:
+            return
+        self._compiled_cache.set(*self._cache_key(locale, resources), compiled_code)
+
+    def _cache_key(self, locale, resources):
+        from .compiled_cache import make_cache_key, options_fingerprint, source_hash
+
+        key = make_cache_key(
+            self._paths, locale, options_fingerprint(**self._compile_options())
+        )
+        return key, source_hash(resources)
 
     def format(self, message_id, args=None):
         # This is the hot path for performance, so we try to optimise,
@@ -246,66 +852,326 @@ class Bundle:
         # FAST PATH:
         # Avoid Activator.get_current_value() here because it adds measurable
         # overhead.
-        current_locale = getattr(_active_locale, "value", None)
-        errors = []
+        current_locale = _active_locale.get()
         try:
             func = self._message_function_cache[current_locale, message_id]
         except KeyError:
-            # SLOW PATH:
-            if current_locale is None:
-                if self._require_activate:
-                    raise NoLocaleSet(
-                        "activate() must be used before using Bundle.format "
-                        "- or, use Bundle(require_activate=False)"
-                    )
+            func = self._get_message_function(current_locale, message_id, args)
+
+        if isinstance(func, str):
+            # Message with constant output, see CompiledUnit.message_constants
+            return func
+        if self._result_cache is not None:
+            return self._format_with_result_cache(
+                current_locale, message_id, func, args
+            )
+        errors = []
+        value = func(args, errors)
+        if errors:
+            for e in errors:
+                self._log_error(current_locale, message_id, args, e)
+        return value
 
-            # current_locale can be `None`, and we will create cache entries
-            # against (None, message_id). This gives us small performance
-            # improvement by moving `if current_locale is None` check out of the
-            # hot path.
-            locale_to_use = current_locale or self._get_default_locale()
-            to_try = list(locale_lookups(locale_to_use))
-            default_locale = self._get_default_locale()
-            if default_locale is not None:
-                to_try = uniquify(to_try + [default_locale])
-
-            func = None
-            for unit in self.get_compiled_unit_for_locale_list(to_try):
-                try:
-                    func = unit.message_functions[message_id]
-                    break
-                except LookupError as e:
-                    self._log_error(unit.locale, message_id, args, e)
-                    continue
-            if func is None:
-                func = _missing_message
-            self._message_function_cache[current_locale, message_id] = func
-            # SLOW PATH END
+    def _format_with_stats(self, message_id, args=None):
+        # Message cache misses are counted in `_get_message_function`.
+        stats = self._stats
+        stats.format_calls += 1
+        interval = stats.latency_sample_interval
+        if interval and not stats.format_calls % interval:
+            start = time.perf_counter()
+            value = self._unwrapped_format(message_id, args)
+            stats.record_latency(time.perf_counter() - start)
+            return value
+        return self._unwrapped_format(message_id, args)
+
+    def _format_for_lazy(self, message_id, args=None):
+        # Looked up on the instance, for `_format_with_stats`
+        return self.format(message_id, args)
+
+    format_lazy = lazy(_format_for_lazy, str)
+
+    def stats(self):
+        """
+        Returns statistics for this bundle as a dictionary of JSON compatible
+        values, or None if it isn't collecting them (see ``collect_stats``).
+        """
+        if self._stats is None:
+            return None
+        stats = self._stats.as_dict()
+        if self._result_cache is not None:
+            stats["result_cache"] = self.result_cache_info()._asdict()
+        return stats
+
+    def format_many(self, messages):
+        """
+        Format a number of messages in one go. `messages` is an iterable whose
+        items are either message IDs or (message ID, args) pairs. Returns a
+        dictionary of message ID to formatted message. Raises ValueError if a
+        message ID is repeated, since the results would overwrite each other.
+        """
+        # Same as `format`, but with the locale lookup and other setup done
+        # just once.
+        current_locale = _active_locale.get()
+        cache = self._message_function_cache
+        errors = []
+        output = {}
+        for item in messages:
+            if isinstance(item, str):
+                message_id, args = item, None
+            else:
+                message_id, args = item
+            if message_id in output:
+                raise ValueError(
+                    f"Message ID '{message_id}' passed to format_many more than once"
+                )
+            try:
+                func = cache[current_locale, message_id]
+            except KeyError:
+                func = self._get_message_function(current_locale, message_id, args)
+            if isinstance(func, str):
+                output[message_id] = func
+                continue
+            if self._result_cache is not None:
+                output[message_id] = self._format_with_result_cache(
+                    current_locale, message_id, func, args
+                )
+                continue
+            output[message_id] = func(args, errors)
+            if errors:
+                for e in errors:
+                    self._log_error(current_locale, message_id, args, e)
+                errors.clear()
+        if self._stats is not None:
+            self._stats.format_calls += len(output)
+        return output
+
+    def _format_with_result_cache(self, current_locale, message_id, func, args):
+        key = _result_cache_key(current_locale, message_id, args)
+        if key is not None:
+            try:
+                value = self._result_cache[key]
+            except KeyError:
+                pass
+            else:
+                self._result_cache_hits += 1
+                return value
 
+        self._result_cache_misses += 1
+        errors = []
         value = func(args, errors)
         if errors:
+            # Not cached, so that errors are logged every time.
             for e in errors:
                 self._log_error(current_locale, message_id, args, e)
+            return value
+        if key is not None:
+            cache = self._result_cache
+            while len(cache) >= self._result_cache_size:
+                # Evict the oldest entry, tolerating other threads doing the same.
+                try:
+                    del cache[next(iter(cache))]
+                except (KeyError, RuntimeError, StopIteration):
+                    break
+            cache[key] = value
         return value
 
-    format_lazy = lazy(format, str)
-
-    def _log_error(self, locale, message_id, args, exception):
-        ftl_logger.error(
-            "FTL exception for locale [%s], message '%s', args %r: %s",
-            locale,
-            message_id,
-            args,
-            repr(exception),
+    def result_cache_info(self):
+        """
+        Returns hit/miss statistics for the result cache, as a ResultCacheInfo
+        named tuple. Counts are approximate if multiple threads are used.
+        """
+        return ResultCacheInfo(
+            hits=self._result_cache_hits,
+            misses=self._result_cache_misses,
+            maxsize=self._result_cache_size,
+            currsize=0 if self._result_cache is None else len(self._result_cache),
         )
 
-    def check_all(self, locales):
+    def _get_message_function(self, current_locale, message_id, args):
+        # SLOW PATH of `format`, used when the message function cache misses.
+        if self._stats is not None:
+            self._stats.cache_misses += 1
+        if current_locale is None:
+            if self._require_activate:
+                raise NoLocaleSet(
+                    "activate() must be used before using Bundle.format "
+                    "- or, use Bundle(require_activate=False)"
+                )
+
+        # current_locale can be `None`, and we will create cache entries
+        # against (None, message_id). This gives us small performance
+        # improvement by moving `if current_locale is None` check out of the
+        # hot path.
+        key = (current_locale, message_id)
+        func = self._previous_message_function_cache.get(key)
+        if func is None:
+            func = self._find_message_function(current_locale, message_id, args)
+        self._cache_message_function(key, func)
+        return func
+
+    def _find_message_function(self, current_locale, message_id, args):
+        for i, unit in enumerate(self._get_available_units(current_locale)):
+            try:
+                func = unit.message_functions[message_id]
+            except LookupError as e:
+                self._log_error(unit.locale, message_id, args, e)
+                continue
+            if i > 0 and self._stats is not None:
+                self._stats.fallbacks += 1
+            # The cache stores the output instead of the function if it is
+            # constant, which `format` checks for.
+            return unit.message_constants.get(message_id, func)
+        if self._stats is not None:
+            self._stats.missing += 1
+        return _missing_message
+
+    def _cache_message_function(self, key, func):
+        # The cache is bounded, because locales often come from user input,
+        # and the number of distinct values could be unlimited. Eviction is
+        # done here, rather than by tracking usage in `format`, so that cache
+        # hits are as cheap as possible.
+        cache = self._message_function_cache
+        max_size = self._message_cache_size
+        if max_size is not None:
+            if self._message_cache_policy == MESSAGE_CACHE_POLICY_LRU:
+                # Approximate LRU using two generations. Entries used since the
+                # last generation started are promoted from the previous
+                # generation in `format`, unused entries are dropped.
+                if len(cache) >= max(max_size // 2, 1):
+                    self._previous_message_function_cache = cache
+                    self._message_function_cache = cache = {}
+            else:
+                while len(cache) >= max(max_size, 1):
+                    # Evict the oldest entry. Other threads could be doing the
+                    # same, so we tolerate failure.
+                    try:
+                        del cache[next(iter(cache))]
+                    except (KeyError, RuntimeError, StopIteration):
+                        break
+        cache[key] = func
+
+    def _log_error(self, locale, message_id, args, exception):
+        if self._stats is not None:
+            self._stats.message_errors += 1
+        self._error_reporter.report(locale, message_id, args, exception)
+
+    def error_counts(self):
+        """
+        Returns a dictionary of (locale, message ID, error type name) to the
+        number of times the error has occurred.
+        """
+        return self._error_reporter.counts()
+
+    def check_all(self, locales, executor=None):
+        if self._lazy_compile:
+            return self._check_all_full(locales, executor=executor)
         errors = []
-        for l in locales:
-            unit = self.get_compiled_unit_for_locale(l)
+        for unit in self.compile_locales(locales, executor=executor).values():
             errors.extend(unit.errors)
         return errors
 
+    def _check_all_full(self, locales, executor=None):
+        # With lazy compilation, units only have errors for messages that have
+        # been used, so we compile everything, without keeping the result.
+        results = []
+        for locale in uniquify(normalize_bcp47(l) for l in locales):
+            args = (
+                locale,
+                self._load_resources(locale),
+                self._use_isolating,
+                self._functions,
+            )
+            if executor is None:
+                results.append(_compile_code_for_bundle(*args))
+            else:
+                results.append(executor.submit(_compile_code_for_bundle, *args))
+        errors = []
+        for result in results:
+            if isinstance(result, Future):
+                result = result.result()
+            errors.extend(result.errors)
+        return errors
+
+    def warmup(self, locales=None, executor=None):
+        """
+        Load and compile the FTL files for the given locales (defaulting to the
+        default locale), returning a dictionary of locale to the time taken in
+        seconds.
+
+        If `executor` is passed, it is used to compile locales concurrently, as
+        for `compile_locales`, and the times are measured from the start of the
+        call until each locale is ready.
+        """
+        if locales is None:
+            locales = [self._get_default_locale()]
+        timings = {}
+        start = time.perf_counter()
+        for locale, unit in self._compile_locales(locales, executor=executor):
+            end = time.perf_counter()
+            timings[locale] = end - start
+            if executor is None:
+                start = end
+        return timings
+
+
+def _compile_code_for_bundle(locale, resources, use_isolating, functions):
+    # Used by Bundle.compile_locales. This is a module level function, so that
+    # it can be used with a process pool.
+    return compile_code(
+        locale,
+        resources,
+        use_isolating=use_isolating,
+        functions=functions,
+        escapers=[html_escaper],
+    )
+
+
+def all_bundles():
+    """
+    Returns a list of all Bundle objects that have been created and are still
+    in use.
+    """
+    return list(_bundle_registry.values())
+
+
+def discover_bundles():
+    """
+    Imports the ``ftl_bundles`` module of every installed app, so that the
+    Bundle objects they define are registered.
+    """
+    autodiscover_modules("ftl_bundles")
+
+
+def preload_bundles(locales=None, gc_freeze=False, processes=None):
+    """
+    Discovers all bundles and warms them up for the given locales. If
+    `gc_freeze` is True, ``gc.freeze()`` is called afterwards, so that forked
+    worker processes can share the compiled messages copy-on-write.
+
+    If `processes` is passed, locales are compiled in parallel using a process
+    pool of that size.
+    """
+    discover_bundles()
+    with process_pool(processes) as executor:
+        for bundle in all_bundles():
+            bundle.warmup(locales=locales, executor=executor)
+    if gc_freeze:
+        gc.freeze()
+
+
+@contextmanager
+def process_pool(processes):
+    """
+    Context manager that gives a ProcessPoolExecutor with `processes` workers,
+    for passing to `Bundle.warmup` or `Bundle.compile_locales`, or None if
+    `processes` is None or 0.
+    """
+    if not processes:
+        yield None
+        return
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        yield executor
+
 
 def _missing_message(args, errors):
     return "???"
@@ -0,0 +1,394 @@
+"""
+Compilation of FTL resources to Python code objects.
+
+This is a thin layer over ``fluent_compiler`` that splits compilation into two
+steps - producing code objects, and turning those code objects into a
+``CompiledFtl`` unit ready for use. Keeping the intermediate step allows the
+output to be stored (e.g. in an on-disk cache) and loaded later without parsing
+or compiling again.
+"""
+
+import ast
+import marshal
+from collections.abc import Mapping
+from threading import Lock
+from types import CodeType
+
+import babel
+from fluent.syntax.visitor import Visitor
+from fluent_compiler.builtins import BUILTINS
+from fluent_compiler.compiler import CompiledFtl, _parse_resources, messages_to_module
+from fluent_compiler.utils import TERM_SIGIL
+
+
+class CompiledUnit(CompiledFtl):
+    """
+    CompiledFtl with the addition of ``message_constants``, a dictionary of
+    message ID to output, for messages whose output is the same for any
+    arguments. These can be returned directly without calling the message
+    function.
+    """
+
+    def __init__(self, message_constants=None, **kwargs):
+        super().__init__(**kwargs)
+        self.message_constants = message_constants or {}
+
+
+class CompiledCode:
+    """
+    The output of compiling the FTL for a single locale, as Python code objects
+    plus the information needed to find the message functions once executed.
+    """
+
+    def __init__(self, locale, code, message_mapping, errors, module_globals=None):
+        self.locale = locale
+        # List of code objects, to be executed in order.
+        self.code = code
+        # Dictionary of message ID to function name.
+        self.message_mapping = message_mapping
+        # List of (message_id or None, exception object)
+        self.errors = errors
+        # The globals used for compilation, if we still have them, which saves
+        # rebuilding them in load_code.
+        self._module_globals = module_globals
+
+    def __getstate__(self):
+        return {
+            "locale": self.locale,
+            "code": marshal.dumps(self.code),
+            "message_mapping": self.message_mapping,
+            "errors": self.errors,
+        }
+
+    def __setstate__(self, state):
+        self.locale = state["locale"]
+        self.code = marshal.loads(state["code"])
+        self.message_mapping = state["message_mapping"]
+        self.errors = state["errors"]
+        self._module_globals = None
+
+
+def compile_code(locale, resources, use_isolating=True, functions=None, escapers=None):
+    """
+    Parse and compile a list of FtlResource objects, returning a CompiledCode
+    object.
+    """
+    # This mirrors fluent_compiler.compiler.compile_messages, but stops before
+    # executing the generated code.
+    module, message_mapping, module_globals, errors = _compile_module(
+        locale,
+        resources,
+        use_isolating=use_isolating,
+        functions=functions,
+        escapers=escapers,
+    )
+    return CompiledCode(
+        locale,
+        _module_to_code(module),
+        message_mapping,
+        errors,
+        module_globals=module_globals,
+    )
+
+
+def compile_source(
+    locale, resources, use_isolating=True, functions=None, escapers=None
+):
+    """
+    Parse and compile a list of FtlResource objects, returning a tuple of
+    (Python source code, message mapping, errors). The source code needs the
+    globals from `get_module_globals` to run.
+
+    Requires Python 3.9 or later.
+    """
+    module, message_mapping, module_globals, errors = _compile_module(
+        locale,
+        resources,
+        use_isolating=use_isolating,
+        functions=functions,
+        escapers=escapers,
+    )
+    return ast.unparse(module.as_ast()), message_mapping, errors
+
+
+def _compile_module(locale, resources, use_isolating, functions, escapers):
+    messages, parsing_issues = _parse_resources(resources)
+    module, message_mapping, module_globals, errors = _messages_to_module(
+        locale,
+        messages,
+        use_isolating=use_isolating,
+        functions=functions,
+        escapers=escapers,
+    )
+    return module, message_mapping, module_globals, parsing_issues + errors
+
+
+def _messages_to_module(locale, messages, use_isolating, functions, escapers):
+    module, message_mapping, module_globals, errors = messages_to_module(
+        messages,
+        _babel_locale(locale),
+        use_isolating=use_isolating,
+        functions=_all_functions(functions),
+        escapers=escapers,
+    )
+    return (
+        module,
+        {
+            str(key): val
+            for key, val in message_mapping.items()
+            if not key.startswith(TERM_SIGIL)
+        },
+        module_globals,
+        errors,
+    )
+
+
+def _module_to_code(module):
+    code = []
+    # Each function gets its own module, so that it can have the FTL file as
+    # its filename, which is helpful for tracebacks.
+    for module_ast in module.as_multiple_module_ast():
+        filename = getattr(module_ast, "filename", "<string>")
+        code.append(compile(module_ast, filename, "exec"))
+    return code
+
+
+def load_code(compiled_code, use_isolating=True, functions=None, escapers=None):
+    """
+    Execute the code in a CompiledCode object, returning a CompiledUnit object.
+
+    The options passed must be the same as those used for `compile_code`.
+    """
+    module_globals = compiled_code._module_globals
+    if module_globals is None:
+        module_globals = get_module_globals(
+            compiled_code.locale,
+            use_isolating=use_isolating,
+            functions=functions,
+            escapers=escapers,
+        )
+    for code_obj in compiled_code.code:
+        exec(code_obj, module_globals)
+
+    return make_unit(
+        compiled_code.locale,
+        compiled_code.message_mapping,
+        compiled_code.errors,
+        module_globals,
+    )
+
+
+def make_unit(locale, message_mapping, errors, module_globals):
+    """
+    Returns a CompiledUnit for message functions that have been defined in
+    `module_globals`.
+    """
+    return CompiledUnit(
+        message_functions={
+            message_id: module_globals[function_name]
+            for message_id, function_name in message_mapping.items()
+        },
+        message_constants=find_constant_messages(message_mapping, module_globals),
+        errors=list(errors),
+        locale=locale,
+    )
+
+
+def lazy_compile_unit(
+    locale, resources, use_isolating=True, functions=None, escapers=None
+):
+    """
+    Parse a list of FtlResource objects, returning a CompiledUnit whose message
+    functions are compiled the first time they are looked up.
+
+    Only parsing errors are in the unit's ``errors`` to begin with, compilation
+    errors are added as messages are compiled. Use `compile_code` to find all
+    errors.
+    """
+    messages, parsing_issues = _parse_resources(resources)
+    errors = list(parsing_issues)
+    message_constants = {}
+    message_functions = LazyMessageFunctions(
+        locale,
+        messages,
+        errors,
+        message_constants,
+        dict(use_isolating=use_isolating, functions=functions, escapers=escapers),
+    )
+    return CompiledUnit(
+        message_functions=message_functions,
+        message_constants=message_constants,
+        errors=errors,
+        locale=locale,
+    )
+
+
+class LazyMessageFunctions(Mapping):
+    """
+    Mapping of message ID to message function, which compiles each message,
+    along with the messages and terms it references, on first access.
+    """
+
+    def __init__(self, locale, messages, errors, message_constants, options):
+        self._locale = locale
+        # Parsed messages and terms, {full ID: AST node}
+        self._messages = messages
+        self._errors = errors
+        self._message_constants = message_constants
+        self._options = options
+        self._functions = {}
+        self._lock = Lock()
+        self._message_ids = set()
+        for full_id, node in messages.items():
+            if full_id.startswith(TERM_SIGIL):
+                continue
+            if node.value is not None:
+                self._message_ids.add(full_id)
+            for attribute in node.attributes:
+                self._message_ids.add(f"{full_id}.{attribute.id.name}")
+
+    def __getitem__(self, message_id):
+        try:
+            return self._functions[message_id]
+        except KeyError:
+            pass
+        if message_id not in self._message_ids:
+            raise KeyError(message_id)
+        with self._lock:
+            if message_id not in self._functions:
+                self._compile(message_id.split(".", 1)[0])
+        return self._functions[message_id]
+
+    def __contains__(self, message_id):
+        return message_id in self._message_ids
+
+    def __iter__(self):
+        return iter(self._message_ids)
+
+    def __len__(self):
+        return len(self._message_ids)
+
+    def _compile(self, full_id):
+        needed = _referenced_ids(self._messages, full_id)
+        # Keep the original order, for consistent naming and output.
+        messages = {k: v for k, v in self._messages.items() if k in needed}
+        module, message_mapping, module_globals, errors = _messages_to_module(
+            self._locale, messages, **self._options
+        )
+        for code_obj in _module_to_code(module):
+            exec(code_obj, module_globals)
+
+        # Referenced messages are compiled too, so we store them as well,
+        # keeping any that were already compiled.
+        new_mapping = {
+            message_id: function_name
+            for message_id, function_name in message_mapping.items()
+            if message_id not in self._functions
+        }
+        new_ids = {message_id.split(".", 1)[0] for message_id in new_mapping}
+        self._errors.extend(
+            (message_id, error)
+            for message_id, error in errors
+            if message_id is None or message_id.split(".", 1)[0] in new_ids
+        )
+        self._message_constants.update(
+            find_constant_messages(new_mapping, module_globals)
+        )
+        for message_id, function_name in new_mapping.items():
+            self._functions[message_id] = module_globals[function_name]
+
+
+class _ReferenceFinder(Visitor):
+    def __init__(self):
+        self.references = []
+
+    def visit_MessageReference(self, node):
+        self.references.append(node.id.name)
+        self.generic_visit(node)
+
+    def visit_TermReference(self, node):
+        self.references.append(TERM_SIGIL + node.id.name)
+        self.generic_visit(node)
+
+
+def _referenced_ids(messages, full_id):
+    """
+    Returns the set of IDs of the message or term `full_id` and of the messages
+    and terms it references, directly or indirectly.
+    """
+    found = set()
+    to_visit = [full_id]
+    while to_visit:
+        current = to_visit.pop()
+        if current in found or current not in messages:
+            continue
+        found.add(current)
+        finder = _ReferenceFinder()
+        node = messages[current]
+        finder.visit(node.value)
+        finder.visit(node.attributes)
+        to_visit.extend(finder.references)
+    return found
+
+
+def find_constant_messages(message_mapping, module_globals):
+    """
+    Returns a dictionary of message ID to output, for the messages whose
+    functions don't look up arguments or call anything other than escapers and
+    other constant messages, and which format without errors.
+    """
+    # Escaper functions are pure functions of their input. Anything else in the
+    # globals (custom functions, NUMBER etc.) could depend on arguments or on
+    # external state.
+    pure_names = {name for name in module_globals if name.startswith("escaper_")}
+    constant_names = set()
+    constants = {}
+    remaining = dict(message_mapping)
+    # Messages can call other messages, so repeat until nothing more is found.
+    changed = True
+    while changed:
+        changed = False
+        for message_id, function_name in list(remaining.items()):
+            code = module_globals[function_name].__code__
+            if not set(code.co_names) <= pure_names | constant_names or any(
+                isinstance(const, CodeType) for const in code.co_consts
+            ):
+                continue
+            errors = []
+            try:
+                value = module_globals[function_name]({}, errors)
+            except Exception:
+                value = None
+            del remaining[message_id]
+            if isinstance(value, str) and not errors:
+                constants[message_id] = value
+                constant_names.add(function_name)
+                changed = True
+    return constants
+
+
+def get_module_globals(locale, use_isolating=True, functions=None, escapers=None):
+    """
+    Returns the globals dictionary that compiled message functions need.
+    """
+    # Names are reserved for globals before any messages, so compiling an empty
+    # set of messages gives us exactly the globals that compile_code used.
+    _, _, module_globals, _ = messages_to_module(
+        {},
+        _babel_locale(locale),
+        use_isolating=use_isolating,
+        functions=_all_functions(functions),
+        escapers=escapers,
+    )
+    return module_globals
+
+
+def _all_functions(functions):
+    all_functions = BUILTINS.copy()
+    if functions:
+        all_functions.update(functions)
+    return all_functions
+
+
+def _babel_locale(locale):
+    return babel.Locale.parse(locale.replace("-", "_"))
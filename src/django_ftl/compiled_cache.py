@@ -0,0 +1,125 @@
+"""
+On-disk cache of compiled FTL, used to avoid parsing and compiling FTL files in
+every new process.
+"""
+
+import hashlib
+import importlib.util
+import logging
+import os
+import pickle
+
+from .utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledCache:
+    """
+    Stores CompiledCode objects in files in a directory.
+
+    Each entry is stored under a key (which identifies the bundle, locale and
+    options), along with a hash of the FTL source. If the source has changed
+    when the entry is retrieved, the entry is treated as missing, and it will be
+    overwritten by the next `set` call.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.directory}>"
+
+    def get(self, key, source_hash):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable compiled FTL cache file {path}: {e!r}")
+            return None
+        if data.get("source_hash") != source_hash:
+            logger.debug(f"Stale compiled FTL cache file {path}")
+            return None
+        return data["compiled_code"]
+
+    def set(self, key, source_hash, compiled_code):
+        path = self._path(key)
+        try:
+            data = pickle.dumps(
+                {"source_hash": source_hash, "compiled_code": compiled_code},
+                pickle.HIGHEST_PROTOCOL,
+            )
+        except Exception as e:
+            # e.g. errors that can't be pickled. We just don't cache in this case.
+            logger.debug(f"Not caching compiled FTL for {path}: {e!r}")
+            return
+        try:
+            atomic_write(path, data)
+        except OSError as e:
+            logger.warning(f"Could not write compiled FTL cache file {path}: {e!r}")
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".ftlc")
+
+
+def make_cache_key(paths, locale, options):
+    """
+    Returns a key for a cache entry, for a bundle with the given paths and
+    options (see `options_fingerprint`), for a locale.
+    """
+    return _hash(repr((list(paths), locale, options)))
+
+
+def options_fingerprint(use_isolating, functions, escapers):
+    """
+    Returns a hashable value that identifies compilation options, plus anything
+    else that would invalidate compiled output.
+    """
+    from django_ftl import __version__
+
+    return (
+        use_isolating,
+        tuple(
+            sorted(
+                (
+                    name,
+                    f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}",
+                )
+                for name, func in (functions or {}).items()
+            )
+        ),
+        tuple(e.name for e in (escapers or [])),
+        __version__,
+        _fluent_compiler_version(),
+        # Code objects are specific to the Python version
+        importlib.util.MAGIC_NUMBER,
+    )
+
+
+def source_hash(resources):
+    """
+    Returns a hash of the contents of a list of FtlResource objects
+    """
+    h = hashlib.sha256()
+    for resource in resources:
+        h.update(repr(resource.filename).encode("utf-8"))
+        h.update(b"\0")
+        h.update(resource.text.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _hash(value):
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _fluent_compiler_version():
+    try:
+        from importlib.metadata import version
+
+        return version("fluent_compiler")
+    except Exception:  # Python < 3.8, or not installed as a distribution
+        return None
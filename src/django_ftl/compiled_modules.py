@@ -0,0 +1,112 @@
+"""
+Compiled FTL stored as ordinary Python modules, in a package named by the
+COMPILED_MODULES_PACKAGE setting. The modules are written by the
+``ftl_compile`` management command, and imported by bundles instead of parsing
+and compiling FTL files, if they are up to date.
+
+Each module defines the message functions for one bundle and locale, plus:
+
+* MESSAGE_MAPPING - dictionary of message ID to function name
+* SOURCE_HASH - hash of the FTL source, used to detect stale modules
+
+The globals the functions need (locale, escapers, custom functions etc.) are
+added to the module before it is executed.
+"""
+
+import hashlib
+import importlib.util
+import logging
+import os
+import py_compile
+import re
+
+from .compilation import compile_source, get_module_globals, make_unit
+from .compiled_cache import make_cache_key, options_fingerprint
+from .utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+def module_name(paths, locale, options):
+    """
+    Returns the module name used for a bundle with the given paths and options
+    (as passed to `compile_code`), for a locale.
+    """
+    # Readable prefix, plus a hash of everything that affects the output, so
+    # that modules built with different options or versions are never used.
+    prefix = re.sub(r"\W", "_", f"{paths[0] if paths else ''}_{locale}").lower()
+    key = make_cache_key(paths, locale, options_fingerprint(**options))
+    return f"{prefix}_{key[:16]}"
+
+
+def source_hash(resources):
+    """
+    Returns a hash of the text of a list of FtlResource objects.
+    """
+    # Unlike compiled_cache.source_hash, file names are not included, so that
+    # modules can be built somewhere other than where they are used.
+    h = hashlib.sha256()
+    for resource in resources:
+        h.update(resource.text.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def write_module(directory, name, locale, resources, options):
+    """
+    Compiles the resources, and writes them as a module called `name` in
+    `directory`, along with its ``.pyc`` file. Returns the path of the module,
+    or None if there were errors in the FTL, in which case nothing is written.
+    """
+    source, message_mapping, errors = compile_source(locale, resources, **options)
+    if errors:
+        return None
+    path = os.path.join(directory, name + ".py")
+    contents = (
+        f"# Generated by django-ftl from FTL files for locale {locale!r}. Do not edit.\n"
+        f"\n"
+        f"MESSAGE_MAPPING = {message_mapping!r}\n"
+        f"SOURCE_HASH = {source_hash(resources)!r}\n\n\n"
+        f"{source}\n"
+    )
+    atomic_write(path, contents, mode="w")
+    py_compile.compile(path, doraise=True)
+    return path
+
+
+def load_module(package, name, locale, resources, options):
+    """
+    Imports the module `name` from `package`, returning a CompiledUnit, or None
+    if the module doesn't exist or is out of date.
+    """
+    try:
+        spec = importlib.util.find_spec(f"{package}.{name}")
+    except ImportError:
+        logger.warning(f"COMPILED_MODULES_PACKAGE {package} could not be imported")
+        return None
+    if spec is None:
+        return None
+    # The module is not added to sys.modules, so that it is loaded again (from
+    # the .pyc file) after the FTL files change and it is regenerated.
+    module = importlib.util.module_from_spec(spec)
+    module_globals = vars(module)
+    module_globals.update(
+        (key, value)
+        for key, value in get_module_globals(locale, **options).items()
+        if not key.startswith("__")
+    )
+    spec.loader.exec_module(module)
+    if module_globals.get("SOURCE_HASH") != source_hash(resources):
+        logger.debug(f"Ignoring out of date compiled FTL module {spec.name}")
+        return None
+    return make_unit(locale, module.MESSAGE_MAPPING, [], module_globals)
+
+
+def package_directory(package):
+    """
+    Returns the directory of an importable package.
+    """
+    spec = importlib.util.find_spec(package)
+    if spec is None or not spec.submodule_search_locations:
+        raise ImportError(f"{package} is not a package")
+    return list(spec.submodule_search_locations)[0]
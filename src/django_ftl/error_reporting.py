@@ -0,0 +1,193 @@
+"""
+Logging of errors that occur when formatting messages, with repeated errors
+aggregated, so that a broken message on a busy page doesn't flood the logs.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import weakref
+
+from django.core.signals import request_finished
+
+from .conf import get_setting
+
+ftl_logger = logging.getLogger("django_ftl.message_errors")
+
+DEFAULT_INTERVAL = 60.0
+DEFAULT_MAX_KEYS = 1000
+
+_reporters = weakref.WeakSet()
+
+
+class _Entry:
+    __slots__ = ["count", "suppressed", "last_logged"]
+
+    def __init__(self, now):
+        self.count = 0
+        self.suppressed = 0
+        self.last_logged = now
+
+
+class ErrorReporter:
+    """
+    Logs errors aggregated by (locale, message ID, error type).
+
+    The first error for each key is logged immediately. Repeats are counted,
+    and logged at most once every `interval` seconds, with the number of errors
+    that were not logged. If `interval` is 0, every error is logged.
+
+    Suppressed counts are also logged at the end of requests once `interval`
+    has passed, and at exit, so they are reported even if no more errors
+    occur.
+
+    At most `max_keys` keys are tracked, after which the oldest are forgotten.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, max_keys=DEFAULT_MAX_KEYS):
+        self.interval = interval
+        self.max_keys = max_keys
+        self.clock = time.monotonic
+        self._entries = {}
+        # Total number of errors reported, including forgotten keys.
+        self.total = 0
+        self._last_flush = self.clock()
+        self._lock = threading.Lock()
+        _reporters.add(self)
+
+    def report(self, locale, message_id, args, exception):
+        key = (locale, message_id, type(exception).__name__)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                while len(self._entries) >= max(self.max_keys, 1):
+                    self._forget_oldest()
+                entry = self._entries[key] = _Entry(now)
+                suppressed = 0
+            elif not self.interval or now - entry.last_logged >= self.interval:
+                suppressed = entry.suppressed
+                entry.suppressed = 0
+                entry.last_logged = now
+            else:
+                suppressed = None
+                entry.suppressed += 1
+            entry.count += 1
+            self.total += 1
+            due = self.interval and self._flush_due(now)
+        if suppressed is not None:
+            self._log(locale, message_id, args, exception, suppressed)
+        if due:
+            self.flush()
+
+    def _forget_oldest(self):
+        key = next(iter(self._entries))
+        entry = self._entries.pop(key)
+        if entry.suppressed:
+            self._log_suppressed(key, entry.suppressed)
+
+    def _flush_due(self, now):
+        # Must be called with the lock held
+        if now - self._last_flush < self.interval:
+            return False
+        self._last_flush = now
+        return True
+
+    def flush_if_due(self):
+        """
+        Calls `flush` if it hasn't been done for `interval` seconds.
+        """
+        now = self.clock()
+        # Checked without the lock first, since this is called for every request.
+        if not self.interval or now - self._last_flush < self.interval:
+            return
+        with self._lock:
+            due = self._flush_due(now)
+        if due:
+            self.flush()
+
+    def flush(self, force=False):
+        """
+        Logs the number of suppressed errors for keys that haven't been logged
+        for `interval` seconds, or for all keys if `force` is True.
+        """
+        now = self.clock()
+        to_log = []
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry.suppressed and (
+                    force or now - entry.last_logged >= self.interval
+                ):
+                    to_log.append((key, entry.suppressed))
+                    entry.suppressed = 0
+                    entry.last_logged = now
+        for key, suppressed in to_log:
+            self._log_suppressed(key, suppressed)
+
+    def counts(self):
+        """
+        Returns a dictionary of (locale, message ID, error type name) to the
+        number of errors seen, for the keys being tracked.
+        """
+        with self._lock:
+            return {key: entry.count for key, entry in self._entries.items()}
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def _log(self, locale, message_id, args, exception, suppressed):
+        if suppressed:
+            ftl_logger.error(
+                "FTL exception for locale [%s], message '%s', args %r: %s "
+                "(%d similar errors not logged)",
+                locale,
+                message_id,
+                args,
+                repr(exception),
+                suppressed,
+            )
+        else:
+            ftl_logger.error(
+                "FTL exception for locale [%s], message '%s', args %r: %s",
+                locale,
+                message_id,
+                args,
+                repr(exception),
+            )
+
+    def _log_suppressed(self, key, suppressed):
+        locale, message_id, error_type = key
+        ftl_logger.error(
+            "FTL exception for locale [%s], message '%s': %d more %s errors not logged",
+            locale,
+            message_id,
+            suppressed,
+            error_type,
+        )
+
+
+def flush_error_reporters(sender=None, force=False, **kwargs):
+    """
+    Logs suppressed error counts of all error reporters that are due. Connected
+    to Django's `request_finished` signal.
+    """
+    for reporter in list(_reporters):
+        if force:
+            reporter.flush(force=True)
+        else:
+            reporter.flush_if_due()
+
+
+request_finished.connect(
+    flush_error_reporters, dispatch_uid="django_ftl.flush_error_reporters"
+)
+atexit.register(flush_error_reporters, force=True)
+
+
+def create_error_reporter():
+    return ErrorReporter(
+        interval=get_setting("ERROR_LOG_INTERVAL", DEFAULT_INTERVAL),
+        max_keys=get_setting("ERROR_LOG_MAX_KEYS", DEFAULT_MAX_KEYS),
+    )
@@ -0,0 +1,161 @@
+"""
+Reloading of FTL files in running processes (e.g. in production), without
+restarting them. See `Bundle.hot_reload`.
+
+A hot reload can be triggered by a signal (HOT_RELOAD_SIGNAL setting), or by
+changing the contents of a version file (HOT_RELOAD_VERSION_FILE setting),
+which the ``ftl_hot_reload`` management command does.
+"""
+
+import logging
+import signal
+import threading
+import time
+import uuid
+
+import django.core.signals as django_signals
+
+from .bundles import all_bundles
+from .conf import get_setting
+from .utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECK_INTERVAL = 5.0
+
+_state_lock = threading.Lock()
+_running = False
+_pending = False
+
+
+def hot_reload_bundles(background=False):
+    """
+    Hot reloads all bundles. If `background` is True, this is done in a new
+    thread, and the thread is returned (or None, if a hot reload that is
+    already running will pick up the request).
+    """
+    global _running, _pending
+    with _state_lock:
+        # If a hot reload is already running, it may have already read the
+        # files, so it needs to go round again.
+        _pending = True
+        if _running:
+            return None
+        _running = True
+    if background:
+        thread = threading.Thread(
+            target=_run, name="django_ftl hot reload", daemon=True
+        )
+        thread.start()
+        return thread
+    _run()
+    return None
+
+
+def _run():
+    global _running, _pending
+    while True:
+        with _state_lock:
+            if not _pending:
+                _running = False
+                return
+            _pending = False
+        start = time.perf_counter()
+        for bundle in all_bundles():
+            try:
+                bundle.hot_reload()
+            except Exception:
+                # The old compiled units are still in use, so we carry on.
+                logger.exception(f"Error hot reloading {bundle!r}")
+        logger.info(f"Hot reloaded FTL bundles in {time.perf_counter() - start:.3f}s")
+
+
+class VersionFileWatcher:
+    """
+    Checks a version file at the start of requests, at most once every
+    `interval` seconds, and triggers a background hot reload if its contents
+    have changed.
+    """
+
+    def __init__(self, path, interval=DEFAULT_CHECK_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.version = read_version(path)
+        self.last_check = time.monotonic()
+        django_signals.request_started.connect(self.new_request, weak=False)
+
+    def disconnect(self):
+        django_signals.request_started.disconnect(self.new_request)
+
+    def new_request(self, sender, **kwargs):
+        now = time.monotonic()
+        if now - self.last_check < self.interval:
+            return
+        self.last_check = now
+        version = read_version(self.path)
+        if version != self.version:
+            logger.info(f"FTL version file {self.path} changed, hot reloading")
+            self.version = version
+            hot_reload_bundles(background=True)
+
+
+def read_version(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def write_version(path):
+    """
+    Writes a new version to the version file, triggering a hot reload in all
+    processes using it.
+    """
+    atomic_write(path, uuid.uuid4().hex, mode="w")
+
+
+def install_signal_handler(signal_name):
+    signum = getattr(signal, signal_name)
+
+    def handler(signum, frame):
+        # Signal handlers run in the main thread between bytecodes, possibly
+        # while it holds locks we need, so we do everything in a new thread.
+        threading.Thread(
+            target=hot_reload_bundles, kwargs={"background": False}, daemon=True
+        ).start()
+
+    try:
+        signal.signal(signum, handler)
+    except ValueError:
+        # Not the main thread
+        logger.warning(
+            f"Could not install {signal_name} handler for FTL hot reload, "
+            "because setup was not done in the main thread"
+        )
+
+
+_version_file_watcher = None
+_signal_installed = None
+
+
+def setup_hot_reload():
+    """
+    Sets up triggers for hot reloading, according to settings.
+    """
+    global _version_file_watcher, _signal_installed
+    signal_name = get_setting("HOT_RELOAD_SIGNAL", None)
+    if signal_name and signal_name != _signal_installed:
+        install_signal_handler(signal_name)
+        _signal_installed = signal_name
+
+    version_file = get_setting("HOT_RELOAD_VERSION_FILE", None)
+    if version_file and (
+        _version_file_watcher is None or _version_file_watcher.path != version_file
+    ):
+        if _version_file_watcher is not None:
+            _version_file_watcher.disconnect()
+        _version_file_watcher = VersionFileWatcher(
+            version_file,
+            interval=get_setting("HOT_RELOAD_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL),
+        )
@@ -0,0 +1,85 @@
+import importlib
+import sys
+
+from babel.core import UnknownLocaleError
+from django.core.management.base import BaseCommand, CommandError
+
+from django_ftl import bundles
+from django_ftl.compiled_modules import package_directory, write_module
+from django_ftl.conf import get_setting
+
+
+class Command(BaseCommand):
+    help = (
+        "Compiles all FTL bundles to Python modules in the COMPILED_MODULES_PACKAGE, "
+        "which bundles will import instead of compiling FTL files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-l",
+            "--locale",
+            action="append",
+            dest="locales",
+            help="Locale to compile. Can be used multiple times. Defaults to all locales that have FTL files.",
+        )
+        parser.add_argument(
+            "--package",
+            default=None,
+            help="Package to write modules into. Defaults to the COMPILED_MODULES_PACKAGE setting.",
+        )
+
+    def handle(self, *args, **options):
+        if sys.version_info < (3, 9):
+            raise CommandError("ftl_compile requires Python 3.9 or later")
+        package = options["package"] or get_setting("COMPILED_MODULES_PACKAGE", None)
+        if not package:
+            raise CommandError(
+                "Use --package or set the COMPILED_MODULES_PACKAGE setting"
+            )
+        try:
+            directory = package_directory(package)
+        except ImportError as e:
+            raise CommandError(f"Could not find package {package}: {e}")
+
+        bundles.discover_bundles()
+        written = 0
+        for bundle in bundles.all_bundles():
+            locales = options["locales"] or self.bundle_locales(bundle)
+            for locale in sorted({bundles.normalize_bcp47(l) for l in locales}):
+                try:
+                    resources = bundle._load_resources(locale, reuse=False)
+                except bundles.FileNotFoundError as e:
+                    # FTL files missing from the default locale
+                    self.stderr.write(f"{bundle!r}: skipping {locale}: {e}")
+                    continue
+                if not resources:
+                    continue
+                try:
+                    path = write_module(
+                        directory,
+                        bundle._compiled_module_name(locale),
+                        locale,
+                        resources,
+                        bundle._compile_options(),
+                    )
+                except (UnknownLocaleError, ValueError) as e:
+                    self.stderr.write(f"{bundle!r}: skipping {locale}: {e}")
+                    continue
+                if path is None:
+                    self.stderr.write(
+                        f"{bundle!r}: skipping {locale}, the FTL files have errors"
+                    )
+                    continue
+                written += 1
+                self.stdout.write(f"{bundle!r}: {locale}: {path}")
+        importlib.invalidate_caches()
+        self.stdout.write(f"Wrote {written} modules to {directory}")
+
+    def bundle_locales(self, bundle):
+        locales = {bundle._get_default_locale()}
+        available_locales = getattr(bundle._finder, "available_locales", None)
+        if available_locales is not None:
+            locales.update(available_locales())
+        locales.discard(None)
+        return locales
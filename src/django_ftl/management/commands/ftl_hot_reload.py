@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_ftl.conf import get_setting
+from django_ftl.hot_reload import write_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Triggers a hot reload of FTL files in all running processes, by updating "
+        "the HOT_RELOAD_VERSION_FILE."
+    )
+
+    def handle(self, *args, **options):
+        version_file = get_setting("HOT_RELOAD_VERSION_FILE", None)
+        if not version_file:
+            raise CommandError("The HOT_RELOAD_VERSION_FILE setting is not set")
+        write_version(version_file)
+        self.stdout.write(f"Updated {version_file}")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_ftl.bundles import DjangoMessageFinder
+from django_ftl.conf import get_setting
+from django_ftl.packed import pack
+
+
+class Command(BaseCommand):
+    help = (
+        "Packs the FTL files in the locales directories of all apps into a single "
+        "file, for use with PackedMessageFinder."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-o",
+            "--output",
+            default=None,
+            help="File to write. Defaults to the PACKED_FILE setting.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["output"] or get_setting("PACKED_FILE", None)
+        if not path:
+            raise CommandError("Use --output or set the PACKED_FILE setting")
+        count = pack(DjangoMessageFinder(), path)
+        self.stdout.write(f"Packed {count} FTL files into {path}")
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from django_ftl.bundles import all_bundles, discover_bundles, process_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads and compiles all FTL bundles, reporting the time taken for each locale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-l",
+            "--locale",
+            action="append",
+            dest="locales",
+            help="Locale to compile. Can be used multiple times. Defaults to the default locale of each bundle.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Number of processes to use for compiling locales in parallel.",
+        )
+
+    def handle(self, *args, **options):
+        discover_bundles()
+        start = time.perf_counter()
+        with process_pool(options["processes"]) as executor:
+            for bundle in all_bundles():
+                bundle_start = time.perf_counter()
+                timings = bundle.warmup(locales=options["locales"], executor=executor)
+                bundle_total = time.perf_counter() - bundle_start
+                self.stdout.write(f"{bundle!r}: {bundle_total * 1000:.1f} ms")
+                for locale, seconds in timings.items():
+                    self.stdout.write(f"  {locale}: {seconds * 1000:.1f} ms")
+        total = time.perf_counter() - start
+        self.stdout.write(f"Total: {total * 1000:.1f} ms")
@@ -10,9 +10,39 @@ try:
 except ImportError:
     get_language_from_request = None
 
+try:
+    from django.utils.decorators import sync_and_async_middleware
+except ImportError:
+    # Django < 3.1, sync only
+    sync_and_async_middleware = None
+
+try:
+    from asgiref.sync import iscoroutinefunction, sync_to_async
+except ImportError:
+    try:
+        from asgiref.sync import sync_to_async
+    except ImportError:
+        sync_to_async = None
+    from asyncio import iscoroutinefunction
+
 from django_ftl import override
 
 
+def _sync_and_async_middleware(func):
+    if sync_and_async_middleware is None:
+        return func
+    return sync_and_async_middleware(func)
+
+
+def _get_language_code_from_session(request):
+    if LANGUAGE_SESSION_KEY is not None:
+        # Django < 4
+        return request.session.get(LANGUAGE_SESSION_KEY, settings.LANGUAGE_CODE)
+    else:
+        return get_language_from_request(request)
+
+
+@_sync_and_async_middleware
 def activate_from_request_session(get_response):
     """
     Middleware that can be placed after django.middleware.session.SessionMiddleware,
@@ -20,21 +50,32 @@ def activate_from_request_session(get_response):
     Internally uses request.session and/or cookies for Fluent translations.
     """
 
-    def middleware(request):
-        if LANGUAGE_SESSION_KEY is not None:
-            # Django < 4
-            language_code = request.session.get(
-                LANGUAGE_SESSION_KEY, settings.LANGUAGE_CODE
-            )
-        else:
-            language_code = get_language_from_request(request)
-        request.LANGUAGE_CODE = language_code
-        with override(language_code):
-            return get_response(request)
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            if LANGUAGE_SESSION_KEY is not None:
+                # Accessing the session may need the database.
+                language_code = await sync_to_async(_get_language_code_from_session)(
+                    request
+                )
+            else:
+                language_code = _get_language_code_from_session(request)
+            request.LANGUAGE_CODE = language_code
+            with override(language_code):
+                return await get_response(request)
+
+    else:
+
+        def middleware(request):
+            language_code = _get_language_code_from_session(request)
+            request.LANGUAGE_CODE = language_code
+            with override(language_code):
+                return get_response(request)
 
     return middleware
 
 
+@_sync_and_async_middleware
 def activate_from_request_language_code(get_response):
     """
     Middleware that can be placed after django.middleware.locale.LocaleMiddleware,
@@ -44,8 +85,16 @@ def activate_from_request_language_code(get_response):
     Requires USE_I18N = True.
     """
 
-    def middleware(request):
-        with override(request.LANGUAGE_CODE):
-            return get_response(request)
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            with override(request.LANGUAGE_CODE):
+                return await get_response(request)
+
+    else:
+
+        def middleware(request):
+            with override(request.LANGUAGE_CODE):
+                return get_response(request)
 
     return middleware
@@ -0,0 +1,111 @@
+"""
+Packed catalogs: all the FTL files used by a project, stored in a single file
+that is read using mmap. This avoids opening and reading lots of small files in
+each process, which can be slow e.g. on container overlay file systems.
+
+Packed files are created with the ``ftl_pack`` management command, and used by
+setting ``FINDER`` to ``"django_ftl.packed.PackedMessageFinder"``.
+"""
+
+import json
+import mmap
+import os
+import struct
+
+from django.core.exceptions import ImproperlyConfigured
+from fluent_compiler.resource import FtlResource
+
+from .bundles import FileNotFoundError, MessageFinderBase, normalize_bcp47
+from .conf import get_setting
+from .utils import atomic_write
+
+MAGIC = b"DJFTLPK1"
+
+# Magic, length of index
+_HEADER = struct.Struct("<8sQ")
+
+
+def pack(finder, path):
+    """
+    Writes all the FTL files that `finder` can find to a packed file at `path`,
+    returning the number of files written.
+    """
+    entries = []
+    chunks = []
+    offset = 0
+    for (locale, relative_path), full_path in sorted(finder.index.items()):
+        if not relative_path.endswith(".ftl"):
+            continue
+        with open(full_path, "rb") as f:
+            data = f.read()
+        entries.append([locale, relative_path, offset, len(data)])
+        chunks.append(data)
+        offset += len(data)
+    index_data = json.dumps(entries).encode("utf-8")
+    atomic_write(
+        path, b"".join([_HEADER.pack(MAGIC, len(index_data)), index_data] + chunks)
+    )
+    return len(entries)
+
+
+class PackedMessageFinder(MessageFinderBase):
+    """
+    Finds FTL files in a packed file created by `pack`, defaulting to the
+    PACKED_FILE setting.
+
+    The file is memory mapped, and file contents are only copied when they are
+    decoded. After replacing the packed file, `invalidate` (which is called by
+    `Bundle.hot_reload`) makes the finder use the new file.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = get_setting("PACKED_FILE", None)
+            if not path:
+                raise ImproperlyConfigured(
+                    "PackedMessageFinder requires the PACKED_FILE setting"
+                )
+        self.path = path
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.path}>"
+
+    @property
+    def locale_base_dirs(self):
+        return []
+
+    def build_index(self):
+        # Index values are memoryviews of the mapped file, which keep it open
+        # for as long as they are in use, including after `invalidate`.
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ImproperlyConfigured(f"{self.path} is not a packed FTL file")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = _HEADER.unpack_from(mapped)
+        if magic != MAGIC:
+            mapped.close()
+            raise ImproperlyConfigured(f"{self.path} is not a packed FTL file")
+        data_start = _HEADER.size + index_length
+        mapped.seek(_HEADER.size)
+        entries = json.loads(mapped.read(index_length))
+        view = memoryview(mapped)
+        index = {}
+        for locale, relative_path, offset, length in entries:
+            start = data_start + offset
+            end = start + length
+            index[locale, relative_path] = view[start:end]
+        return index
+
+    def load(self, locale, path, reloader=None):
+        # The packed file isn't watched by the reloader, it is only reloaded
+        # by `invalidate`.
+        locale = normalize_bcp47(locale)
+        try:
+            data = self.index[locale, path]
+        except KeyError:
+            raise FileNotFoundError(
+                f"Could not find locate FTL file {locale}/{path} in {self.path}"
+            )
+        return FtlResource(
+            text=str(data, "utf-8"), filename=f"{self.path}:{locale}/{path}"
+        )
@@ -0,0 +1,141 @@
+"""
+Opt-in runtime statistics for bundles, enabled with the ``collect_stats``
+parameter to ``Bundle`` or the COLLECT_STATS setting.
+
+Counters are updated without locking, so they can be slightly out when multiple
+threads are used, in exchange for keeping the overhead low.
+"""
+
+import json
+import os
+import time
+
+# Upper bounds, in seconds, of the buckets of the format latency histogram.
+LATENCY_BUCKETS = (
+    0.000001,
+    0.000002,
+    0.000005,
+    0.00001,
+    0.00002,
+    0.00005,
+    0.0001,
+    0.0002,
+    0.0005,
+    0.001,
+    0.01,
+)
+
+
+class BundleStats:
+    """
+    Counters for a single bundle. If `latency_sample_interval` is not zero, one
+    in every `latency_sample_interval` calls to ``format`` is timed.
+    """
+
+    def __init__(self, latency_sample_interval=0):
+        self.latency_sample_interval = latency_sample_interval
+        # Calls to `format`, plus messages formatted by `format_many`
+        self.format_calls = 0
+        self.cache_misses = 0
+        # Lookups where the message was found in a fallback locale, or not at all
+        self.fallbacks = 0
+        self.missing = 0
+        self.message_errors = 0
+        # locale -> [count, seconds, number of messages]
+        self.compiles = {}
+        self.latency_samples = 0
+        self.latency_total = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record_compile(self, locale, seconds, message_count):
+        entry = self.compiles.setdefault(locale, [0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = message_count
+
+    def record_latency(self, seconds):
+        self.latency_samples += 1
+        self.latency_total += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            i = len(LATENCY_BUCKETS)
+        self.latency_buckets[i] += 1
+
+    def as_dict(self):
+        """
+        Returns the statistics as a dictionary of JSON compatible values.
+        """
+        buckets = {}
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), self.latency_buckets):
+            buckets[str(bound)] = count
+        return {
+            "message_cache": {
+                "hits": max(self.format_calls - self.cache_misses, 0),
+                "misses": self.cache_misses,
+            },
+            "lookups": {"fallbacks": self.fallbacks, "missing": self.missing},
+            "message_errors": self.message_errors,
+            "compiles": {
+                locale: {"count": count, "seconds": seconds, "messages": messages}
+                for locale, (count, seconds, messages) in self.compiles.items()
+            },
+            "format_calls": self.format_calls,
+            "format_latency": {
+                "samples": self.latency_samples,
+                "total_seconds": self.latency_total,
+                "buckets": buckets,
+            },
+        }
+
+
+def combine_stats(stats_list):
+    """
+    Adds up a list of dictionaries returned by `BundleStats.as_dict`.
+    """
+    total = BundleStats().as_dict()
+    for stats in stats_list:
+        _add_into(total, stats)
+    return total
+
+
+def _add_into(total, stats):
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            _add_into(total.setdefault(key, {}), value)
+        elif key in total:
+            total[key] += value
+        else:
+            total[key] = value
+
+
+def snapshot():
+    """
+    Returns the statistics for all bundles that collect them, plus totals, as a
+    dictionary of JSON compatible values. Compile counts and times in the
+    totals are summed over bundles, with ``messages`` the total message count.
+    """
+    from .bundles import all_bundles
+
+    bundles = []
+    for bundle in all_bundles():
+        stats = bundle.stats()
+        if stats is not None:
+            bundles.append(dict(stats, bundle=repr(bundle)))
+    return {
+        "timestamp": time.time(),
+        "pid": os.getpid(),
+        "bundles": bundles,
+        "totals": combine_stats(
+            {k: v for k, v in stats.items() if k != "bundle"} for stats in bundles
+        ),
+    }
+
+
+def snapshot_json(**kwargs):
+    """
+    Returns `snapshot` as a JSON string, for exporting to a metrics system.
+    Keyword arguments are passed to ``json.dumps``.
+    """
+    return json.dumps(snapshot(), **kwargs)
@@ -1,10 +1,12 @@
 import contextlib
 
 from django import template
-from django.template.base import token_kwargs
+from django.template.base import Variable, token_kwargs
+from django.utils.html import conditional_escape
 from django.utils.module_loading import import_string
 
 import django_ftl
+from django_ftl.bundles import MAX_LOCALES_CACHED, activator
 
 register = template.Library()
 
@@ -15,14 +17,38 @@ MODE_VAR_NAME = "__ftl_mode"
 BUNDLE_VAR_NAME = "__ftl_bundle"
 
 
-@register.simple_tag(takes_context=True)
-def ftlconf(context, mode=None, bundle=None):
-    if mode is not None:
-        validate_mode(mode)
-        context[MODE_VAR_NAME] = mode
-    if bundle is not None:
-        context[BUNDLE_VAR_NAME] = resolve_bundle(bundle)
-    return ""
+class FtlConfNode(template.Node):
+    def __init__(self, mode=None, bundle=None):
+        self.mode = mode
+        self.bundle = bundle
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>"
+
+    def render(self, context):
+        if self.mode is not None:
+            mode = self.mode.resolve(context)
+            validate_mode(mode)
+            context[MODE_VAR_NAME] = mode
+        if self.bundle is not None:
+            context[BUNDLE_VAR_NAME] = self.bundle.resolve(context)
+        return ""
+
+
+@register.tag("ftlconf")
+def ftlconf(parser, token):
+    bits = token.split_contents()
+    tag_name = bits.pop(0)
+    conf = token_kwargs(bits, parser, support_legacy=False)
+    mode = conf.pop("mode", None)
+    bundle = conf.pop("bundle", None)
+    if conf or bits:
+        raise template.TemplateSyntaxError(
+            f"'{tag_name}' received unexpected arguments: {' '.join(list(conf.keys()) + bits)}"
+        )
+    return FtlConfNode(
+        mode=mode, bundle=None if bundle is None else BundleExpression(bundle)
+    )
 
 
 def resolve_bundle(bundle):
@@ -32,16 +58,158 @@ def resolve_bundle(bundle):
         return bundle
 
 
+class FtlMsgNode(template.Node):
+    def __init__(self, message_id, kwargs, target_var=None):
+        self.message_id = message_id
+        self.kwargs = kwargs
+        self.target_var = target_var
+        self.literal_message_id = literal_value(message_id)
+        literal_args = {name: literal_value(value) for name, value in kwargs.items()}
+        if self.literal_message_id is NOT_LITERAL or any(
+            value is NOT_LITERAL for value in literal_args.values()
+        ):
+            self.literal_args = None
+        else:
+            self.literal_args = literal_args
+        # (bundle, locale) -> (bundle generation, output), used when the message
+        # ID and all arguments are literals.
+        self._rendered = {}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.message_id.token!r}>"
+
+    def render(self, context):
+        mode = context.get(MODE_VAR_NAME, MODE_SERVER)
+        bundle = get_bundle(context)
+        if mode != MODE_SERVER:
+            raise AssertionError("Not reached")
+        if self.literal_args is not None:
+            output = self.format_literal(bundle)
+        else:
+            if self.literal_message_id is NOT_LITERAL:
+                message_id = self.message_id.resolve(context)
+            else:
+                message_id = self.literal_message_id
+            args = {name: value.resolve(context) for name, value in self.kwargs.items()}
+            output = bundle.format(message_id, args)
+
+        if self.target_var is not None:
+            context[self.target_var] = output
+            return ""
+        if context.autoescape:
+            output = conditional_escape(output)
+        return output
+
+    def format_literal(self, bundle):
+        # The output can only depend on the bundle and the locale, so we only
+        # need to format once for each combination, until the bundle is
+        # reloaded. With no active locale, it also depends on settings, so we
+        # don't memoize.
+        locale = activator.get_current_value()
+        generation = getattr(bundle, "_generation", None)
+        if locale is None or generation is None:
+            return bundle.format(self.literal_message_id, self.literal_args)
+        key = (bundle, locale)
+        try:
+            rendered_generation, output = self._rendered[key]
+        except KeyError:
+            pass
+        else:
+            if rendered_generation == generation:
+                if bundle._stats is not None:
+                    bundle._stats.format_calls += 1
+                return output
+        error_reporter = bundle._error_reporter
+        errors_before = error_reporter.total
+        output = bundle.format(self.literal_message_id, self.literal_args)
+        # Output with errors isn't memoized, so that errors are logged every
+        # time, as with `Bundle.format`.
+        if error_reporter.total == errors_before:
+            if len(self._rendered) >= MAX_LOCALES_CACHED:
+                self._rendered.clear()
+            self._rendered[key] = (generation, output)
+        return output
+
+
+@register.tag("ftlmsg")
+def ftlmsg(parser, token):
+    bits = token.split_contents()
+    tag_name = bits.pop(0)
+    target_var = None
+    if len(bits) >= 2 and bits[-2] == "as":
+        target_var = bits[-1]
+        bits = bits[:-2]
+    if not bits:
+        raise template.TemplateSyntaxError(f"'{tag_name}' requires a message ID")
+    message_id = parser.compile_filter(bits.pop(0))
+    kwargs = token_kwargs(bits, parser, support_legacy=False)
+    if bits:
+        raise template.TemplateSyntaxError(
+            f"'{tag_name}' received unexpected arguments: {' '.join(bits)}"
+        )
+    return FtlMsgNode(message_id, kwargs, target_var=target_var)
+
+
 @register.simple_tag(takes_context=True)
-def ftlmsg(context, message_id, **kwargs):
+def ftlmsgs(context, **message_ids):
+    """
+    Formats a number of messages (without arguments) in one go, returning a
+    dictionary. Keyword arguments map names to message IDs, for example:
+
+        {% ftlmsgs title='events-title' intro='events-intro' as msgs %}
+        {{ msgs.title }}
+    """
     mode = context.get(MODE_VAR_NAME, MODE_SERVER)
+    bundle = get_bundle(context)
+    if mode == MODE_SERVER:
+        # Different names can refer to the same message.
+        formatted = bundle.format_many(dict.fromkeys(message_ids.values()))
+        return {name: formatted[message_id] for name, message_id in message_ids.items()}
+    raise AssertionError("Not reached")
+
+
+def get_bundle(context):
     try:
-        bundle = context[BUNDLE_VAR_NAME]
+        return context[BUNDLE_VAR_NAME]
     except KeyError:
         raise ValueError("No bundle set for ftl - use ftlconf/withftl to set bundle")
-    if mode == MODE_SERVER:
-        return bundle.format(message_id, kwargs)
-    raise AssertionError("Not reached")
+
+
+NOT_LITERAL = object()
+
+
+def literal_value(filter_expression):
+    """
+    Returns the value of a template FilterExpression if it is a constant
+    (a string or number with no filters), or NOT_LITERAL otherwise.
+    """
+    if filter_expression.filters:
+        return NOT_LITERAL
+    var = filter_expression.var
+    if isinstance(var, Variable):
+        if var.lookups is None:
+            return var.literal
+        return NOT_LITERAL
+    return var
+
+
+class BundleExpression:
+    """
+    Wraps the FilterExpression for a `bundle` argument. Literal bundle paths
+    are imported only once, rather than on every render.
+    """
+
+    def __init__(self, filter_expression):
+        self.filter_expression = filter_expression
+        self.literal = literal_value(filter_expression)
+        self._bundle = None
+
+    def resolve(self, context):
+        if self.literal is NOT_LITERAL:
+            return resolve_bundle(self.filter_expression.resolve(context))
+        if self._bundle is None:
+            self._bundle = resolve_bundle(self.literal)
+        return self._bundle
 
 
 def validate_mode(mode):
@@ -64,11 +232,7 @@ class WithFtlNode(template.Node):
         mode = None if self.mode is None else self.mode.resolve(context)
         if mode is not None:
             validate_mode(mode)
-        bundle = (
-            None
-            if self.bundle is None
-            else resolve_bundle(self.bundle.resolve(context))
-        )
+        bundle = None if self.bundle is None else self.bundle.resolve(context)
         new_context = {}
         if mode is not None:
             new_context[MODE_VAR_NAME] = mode
@@ -99,7 +263,12 @@ def withftl(parser, token):
     nodelist = parser.parse(("endwithftl",))
     parser.delete_first_token()
 
-    return WithFtlNode(nodelist, language=language, mode=mode, bundle=bundle)
+    return WithFtlNode(
+        nodelist,
+        language=language,
+        mode=mode,
+        bundle=None if bundle is None else BundleExpression(bundle),
+    )
 
 
 @contextlib.contextmanager
@@ -1,3 +1,7 @@
+import os
+import tempfile
+
+
 def make_namespace(**attributes):
     class namespace:
         pass
@@ -7,3 +11,25 @@ def make_namespace(**attributes):
         setattr(namespace, k, v)
 
     return namespace
+
+
+def atomic_write(path, data, mode="wb"):
+    """
+    Writes `data` to the file at `path` (creating its directory if needed),
+    using a temporary file and a rename, so that other processes never see a
+    partially written file. `mode` is "wb" for bytes or "w" for text.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    encoding = None if "b" in mode else "utf-8"
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
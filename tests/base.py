@@ -2,6 +2,7 @@ from django.test import TestCase
 from django_functest import FuncWebTestMixin
 
 from django_ftl import deactivate
+from django_ftl.bundles import MessageFinderBase
 
 
 class TestBase(TestCase):
@@ -12,3 +13,12 @@ class TestBase(TestCase):
 
 class WebTestBase(FuncWebTestMixin, TestBase):
     setup_auth = False
+
+
+class TempDirFinder(MessageFinderBase):
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+
+    @property
+    def locale_base_dirs(self):
+        return [self.base_dir]
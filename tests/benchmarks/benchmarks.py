@@ -5,14 +5,26 @@
 
 # This should be run using pytest, see end of file
 
+import asyncio
 import os
 import subprocess
 import sys
+import threading
+from contextvars import ContextVar
 
 import pytest
-
-from django_ftl import activate
+from asgiref.sync import async_to_sync, sync_to_async
+from django import template
+from django.core.signals import request_started
+from django.http import HttpResponse
+from django.template import Context, Engine
+from django.test import RequestFactory
+
+from django_ftl import activate, override
 from django_ftl.bundles import Bundle
+from django_ftl.middleware import activate_from_request_language_code
+from django_ftl.templatetags import ftl as ftl_tags
+from django_ftl.templatetags.ftl import BUNDLE_VAR_NAME, get_bundle, resolve_bundle
 
 this_file = os.path.abspath(__file__)
 
@@ -45,6 +57,155 @@ def test_simple_string_present_in_fallback(bundle, benchmark):
     assert result == "Hello I am a simple string present in fallback"
 
 
+# Cold start, with multiple threads each needing a different locale at the same
+# time. Compilation of each locale is locked separately, so threads only wait
+# for the locale they need.
+
+COLD_START_LOCALES = ["en", "tr", "fr", "de"]
+
+
+def test_cold_start_multithreaded(benchmark):
+    def setup():
+        bundle = Bundle(
+            ["benchmarks/benchmarks.ftl"], default_locale="en", auto_reload=False
+        )
+        return (bundle,), {}
+
+    def compile_all(bundle):
+        threads = [
+            threading.Thread(target=bundle.get_compiled_unit_for_locale, args=(l,))
+            for l in COLD_START_LOCALES
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return bundle
+
+    bundle = benchmark.pedantic(compile_all, setup=setup, rounds=50)
+    assert set(bundle._compiled_unit_for_locale) == set(COLD_START_LOCALES)
+
+
+# Storage for the active locale. Bundle.format uses a ContextVar, these
+# compare it with the threading.local that was used previously.
+
+_thread_local = threading.local()
+_thread_local.value = "en"
+_context_var = ContextVar("benchmark_locale", default=None)
+_context_var.set("en")
+
+
+def test_active_locale_thread_local(benchmark):
+    result = benchmark(lambda: getattr(_thread_local, "value", None))
+    assert result == "en"
+
+
+def test_active_locale_context_var(benchmark):
+    result = benchmark(lambda: _context_var.get())
+    assert result == "en"
+
+
+# Middleware under ASGI. A sync-only middleware in an async middleware chain has
+# to be adapted by Django, which costs thread switches on every request. These
+# reproduce what django.core.handlers.base.BaseHandler.adapt_method_mode does.
+
+
+def sync_only_activate_from_request_language_code(get_response):
+    def middleware(request):
+        with override(request.LANGUAGE_CODE):
+            return get_response(request)
+
+    return middleware
+
+
+async def async_view(request):
+    return HttpResponse("")
+
+
+@pytest.fixture
+def asgi_request():
+    request = RequestFactory().get("/")
+    request.LANGUAGE_CODE = "en"
+    return request
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_middleware_asgi_sync_only(benchmark, asgi_request, event_loop):
+    middleware = sync_to_async(
+        sync_only_activate_from_request_language_code(async_to_sync(async_view)),
+        thread_sensitive=True,
+    )
+    benchmark(lambda: event_loop.run_until_complete(middleware(asgi_request)))
+
+
+def test_middleware_asgi_native(benchmark, asgi_request, event_loop):
+    middleware = activate_from_request_language_code(async_view)
+    benchmark(lambda: event_loop.run_until_complete(middleware(asgi_request)))
+
+
+# Auto-reloading in development. All bundles share a single file watcher, so
+# the cost per request should not depend on the number of bundles.
+
+
+@pytest.mark.parametrize("bundle_count", [1, 40])
+def test_autoreload_request_overhead(benchmark, bundle_count):
+    bundles = [
+        Bundle(["benchmarks/benchmarks.ftl"], default_locale="en", auto_reload=True)
+        for i in range(bundle_count)
+    ]
+    for bundle in bundles:
+        bundle.format("simple-string")
+    benchmark(lambda: request_started.send(sender=None))
+
+
+# Templates with many messages. `ftl` is the real tag library, `ftl_simple_tags`
+# reproduces the previous implementation, which used simple_tag and resolved
+# everything on every render.
+
+simple_tags = template.Library()
+
+
+@simple_tags.simple_tag(takes_context=True)
+def ftlconf(context, bundle=None):
+    context[BUNDLE_VAR_NAME] = resolve_bundle(bundle)
+    return ""
+
+
+@simple_tags.simple_tag(takes_context=True)
+def ftlmsg(context, message_id, **kwargs):
+    return get_bundle(context).format(message_id, kwargs)
+
+
+template_bundle = Bundle(["benchmarks/benchmarks.ftl"], default_locale="en")
+
+MESSAGE_HEAVY_TEMPLATE = (
+    """{% load LIBRARY %}{% ftlconf bundle='benchmarks.template_bundle' %}"""
+    + "<p>{% ftlmsg 'simple-string' %}</p>" * 40
+    + "<p>{% ftlmsg 'greeting' name=name %}</p>" * 10
+)
+
+
+@pytest.fixture(params=["ftl", "ftl_simple_tags"])
+def message_heavy_template(request):
+    engine = Engine()
+    engine.template_libraries["ftl"] = ftl_tags.register
+    engine.template_libraries["ftl_simple_tags"] = simple_tags
+    return engine.from_string(MESSAGE_HEAVY_TEMPLATE.replace("LIBRARY", request.param))
+
+
+def test_message_heavy_template(benchmark, message_heavy_template):
+    activate("en")
+    context = Context({"name": "Jane"})
+    result = benchmark(lambda: message_heavy_template.render(context))
+    assert result.count("Hello I am a simple string") == 40
+
+
 if __name__ == "__main__":
     # You can execute this file directly, and optionally add more py.test args
     # to the command line (e.g. -k for keyword matching certain tests).
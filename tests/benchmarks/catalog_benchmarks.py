@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+
+# Benchmarks using synthetic catalogs of realistic size and content (see
+# catalogs.py), for catching performance regressions before a release.
+#
+# Results can be saved as JSON baselines and later runs compared against them:
+#
+#   ./tests/benchmarks/catalog_benchmarks.py save
+#   ./tests/benchmarks/catalog_benchmarks.py compare
+#
+# The catalog sizes used are set with the FTL_BENCHMARK_CATALOGS environment
+# variable, a comma separated list of MESSAGESxLOCALES, e.g. "1000x2,50000x50".
+# Comparisons are only meaningful between runs with the same sizes on the same
+# machine.
+
+import os
+import subprocess
+import sys
+
+import catalogs
+import pytest
+from catalogs import DEFAULT_LOCALE, MESSAGE_ARGS, PATH, CatalogFinder, message_ids
+from django.http import HttpResponse
+from django.template import Context, Engine
+from django.test import RequestFactory
+
+from django_ftl import activate
+from django_ftl.bundles import Bundle
+from django_ftl.middleware import activate_from_request_language_code
+from django_ftl.templatetags import ftl as ftl_tags
+
+this_file = os.path.abspath(__file__)
+this_dir = os.path.dirname(this_file)
+
+DEFAULT_CATALOGS = "1000x2"
+
+# Maximum regression allowed by `compare`, in pytest-benchmark's format.
+DEFAULT_COMPARE_FAIL = "median:15%"
+
+
+def catalog_sizes():
+    spec = os.environ.get("FTL_BENCHMARK_CATALOGS", DEFAULT_CATALOGS)
+    sizes = []
+    for item in spec.split(","):
+        message_count, locale_count = item.strip().split("x")
+        sizes.append((int(message_count), max(int(locale_count), 2)))
+    return sizes
+
+
+class Catalog:
+    def __init__(self, base_dir, message_count, locales):
+        self.base_dir = base_dir
+        self.message_count = message_count
+        self.locales = locales
+        # A translated locale other than the default, used for most benchmarks.
+        self.locale = locales[-1]
+
+    def bundle(self, **kwargs):
+        return Bundle(
+            [PATH],
+            default_locale=DEFAULT_LOCALE,
+            finder=CatalogFinder(self.base_dir),
+            auto_reload=False,
+            **kwargs,
+        )
+
+
+@pytest.fixture(
+    scope="session",
+    params=catalog_sizes(),
+    ids=lambda size: f"{size[0]}x{size[1]}",
+)
+def catalog(request, tmp_path_factory):
+    message_count, locale_count = request.param
+    base_dir = str(tmp_path_factory.mktemp("catalog"))
+    locales = catalogs.write_catalog(base_dir, message_count, locale_count)
+    return Catalog(base_dir, message_count, locales)
+
+
+@pytest.fixture(scope="session")
+def compiled_bundle(catalog):
+    bundle = catalog.bundle()
+    bundle.compile_locales([DEFAULT_LOCALE, catalog.locale])
+    return bundle
+
+
+@pytest.fixture
+def bundle(catalog, compiled_bundle):
+    activate(catalog.locale)
+    return compiled_bundle
+
+
+# Hot `format()` for each type of message. The first messages in the catalog
+# have one of each type, and are all translated.
+
+MESSAGE_KINDS = {
+    id_template.split("-")[0]: id_template.format(i=i)
+    for i, (id_template, value_template) in enumerate(catalogs.MESSAGE_TEMPLATES)
+}
+
+
+@pytest.mark.parametrize("kind", list(MESSAGE_KINDS))
+def test_format(bundle, benchmark, kind):
+    message_id = MESSAGE_KINDS[kind]
+    result = benchmark(bundle.format, message_id, MESSAGE_ARGS)
+    assert result.startswith("[")
+
+
+def test_format_page(catalog, bundle, benchmark):
+    # A page using 100 different messages from across the catalog.
+    ids = message_ids(catalog.message_count)
+    page = ids[:: max(len(ids) // 100, 1)]
+
+    def render_page():
+        return [bundle.format(message_id, MESSAGE_ARGS) for message_id in page]
+
+    assert len(benchmark(render_page)) == len(page)
+
+
+def test_format_fallback(catalog, bundle, benchmark):
+    # Not translated, found in the default locale.
+    message_id = message_ids(catalog.message_count)[catalogs.UNTRANSLATED_EVERY - 1]
+    result = benchmark(bundle.format, message_id, MESSAGE_ARGS)
+    assert result.startswith(f"[{DEFAULT_LOCALE}]")
+
+
+def test_format_lazy(bundle, benchmark):
+    lazy_string = bundle.format_lazy(MESSAGE_KINDS["args"], MESSAGE_ARGS)
+    result = benchmark(str, lazy_string)
+    assert "Jane" in result
+
+
+# Cold compilation of one locale, with a new bundle every round.
+
+
+def test_compile_locale(catalog, benchmark):
+    def setup():
+        return (catalog.bundle(),), {}
+
+    def compile_locale(bundle):
+        return bundle.get_compiled_unit_for_locale(catalog.locale)
+
+    benchmark.pedantic(compile_locale, setup=setup, rounds=3)
+
+
+def test_first_format_lazy_compile(catalog, benchmark):
+    def setup():
+        activate(catalog.locale)
+        bundle = catalog.bundle(lazy_compile=True)
+        bundle.get_compiled_unit_for_locale(DEFAULT_LOCALE)
+        return (bundle,), {}
+
+    def first_format(bundle):
+        return bundle.format(MESSAGE_KINDS["term"], MESSAGE_ARGS)
+
+    result = benchmark.pedantic(first_format, setup=setup, rounds=10)
+    assert result.startswith(f"[{catalog.locale}]")
+
+
+# Templates
+
+TEMPLATE_ARGS = " ".join(f"{name}={name}" for name in MESSAGE_ARGS)
+
+FTLMSG_TEMPLATE = "{% load ftl %}{% ftlconf bundle=bundle %}" + (
+    "".join(
+        f"<p>{{% ftlmsg '{message_id}' {TEMPLATE_ARGS} %}}</p>"
+        for message_id in MESSAGE_KINDS.values()
+    )
+    * 10
+)
+
+WITHFTL_TEMPLATE = (
+    "{% load ftl %}"
+    + "{% withftl bundle=bundle language=language %}"
+    + "<p>{% ftlmsg 'simple-0' %}</p>" * 5
+    + "{% endwithftl %}"
+) * 10
+
+
+@pytest.fixture
+def template_engine():
+    engine = Engine()
+    engine.template_libraries["ftl"] = ftl_tags.register
+    return engine
+
+
+@pytest.mark.parametrize(
+    "template_string,message_count",
+    [(FTLMSG_TEMPLATE, 70), (WITHFTL_TEMPLATE, 50)],
+    ids=["ftlmsg", "withftl"],
+)
+def test_template(
+    catalog, bundle, benchmark, template_engine, template_string, message_count
+):
+    template = template_engine.from_string(template_string)
+    context = Context(dict(MESSAGE_ARGS, bundle=bundle, language=catalog.locale))
+    result = benchmark(template.render, context)
+    assert result.count(f"<p>[{catalog.locale}]") == message_count
+
+
+# Middleware overhead, compared with calling the view directly.
+
+
+def view(request):
+    return HttpResponse("")
+
+
+@pytest.mark.parametrize("middleware", [None, activate_from_request_language_code])
+def test_middleware(catalog, benchmark, middleware):
+    request = RequestFactory().get("/")
+    request.LANGUAGE_CODE = catalog.locale
+    handler = view if middleware is None else middleware(view)
+    benchmark(handler, request)
+
+
+if __name__ == "__main__":
+    # Usage: catalog_benchmarks.py [save|compare] [pytest args...]
+    #
+    # `save` saves the results as a new JSON baseline, and `compare` compares
+    # with the most recent baseline, failing if anything is slower by more than
+    # DEFAULT_COMPARE_FAIL (unless --benchmark-compare-fail is passed).
+    args = sys.argv[1:]
+    mode = args.pop(0) if args and args[0] in ("save", "compare") else None
+    pytest_args = [
+        "pytest",
+        "--benchmark-warmup=on",
+        "--benchmark-sort=name",
+        f"--benchmark-storage=file://{os.path.join(this_dir, '.benchmarks')}",
+    ]
+    if mode == "save":
+        pytest_args.append("--benchmark-autosave")
+    elif mode == "compare":
+        pytest_args.append("--benchmark-compare")
+        if not any(arg.startswith("--benchmark-compare-fail") for arg in args):
+            pytest_args.append(f"--benchmark-compare-fail={DEFAULT_COMPARE_FAIL}")
+    subprocess.check_call(pytest_args + [this_file] + args)
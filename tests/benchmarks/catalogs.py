@@ -0,0 +1,109 @@
+"""
+Generation of synthetic FTL catalogs for benchmarks.
+
+Catalogs are made of a repeating mix of message types, similar to what a real
+project has: plain strings, messages with arguments, plurals, selectors, terms,
+``-html`` messages and function calls. Locales other than the default one only
+translate some of the messages, so that fallback lookups happen.
+"""
+
+import os
+
+from django_ftl.bundles import MessageFinderBase
+
+# Locales that have CLDR plural rules, so that plurals compile for all of them.
+LOCALES = [
+    "en", "de", "fr", "es", "it", "pt", "nl", "sv", "da", "nb",
+    "fi", "pl", "cs", "sk", "hu", "ro", "bg", "hr", "sl", "sr",
+    "ru", "uk", "tr", "el", "he", "ar", "fa", "hi", "bn", "ja",
+    "ko", "zh", "th", "vi", "id", "ms", "ca", "eu", "gl", "et",
+    "lv", "lt", "is", "ga", "cy", "sq", "mk", "ka", "hy", "az",
+]  # fmt: skip
+
+DEFAULT_LOCALE = "en"
+
+PATH = "catalog/main.ftl"
+
+TERM_COUNT = 20
+
+# One in UNTRANSLATED_EVERY messages is missing from non-default locales.
+UNTRANSLATED_EVERY = 10
+
+MESSAGE_TEMPLATES = [
+    ("simple-{i}", "{tag} simple message number {i}"),
+    ("args-{i}", "{tag} hello {{ $name }}, you have {{ $count }} new messages"),
+    (
+        "plural-{i}",
+        "\n"
+        "    {{ $count ->\n"
+        "        [one] {tag} one item\n"
+        "       *[other] {tag} {{ $count }} items\n"
+        "    }}",
+    ),
+    (
+        "select-{i}",
+        "\n"
+        "    {{ $gender ->\n"
+        "        [male] {tag} he liked your post\n"
+        "        [female] {tag} she liked your post\n"
+        "       *[other] {tag} they liked your post\n"
+        "    }}",
+    ),
+    ("term-{i}", "{tag} welcome to {{ -brand-{term} }}"),
+    ("html-{i}-html", '{tag} <b>hello</b> {{ $name }}, <a href="/">go home</a>'),
+    ("number-{i}", "{tag} total: {{ NUMBER($amount, minimumFractionDigits: 2) }}"),
+]
+
+# Arguments that work with every message in the catalog.
+MESSAGE_ARGS = {"name": "Jane", "count": 3, "gender": "female", "amount": 1234.5}
+
+
+def message_ids(message_count):
+    """
+    Returns the message IDs in a catalog of the given size, in order.
+    """
+    return [
+        MESSAGE_TEMPLATES[i % len(MESSAGE_TEMPLATES)][0].format(i=i)
+        for i in range(message_count)
+    ]
+
+
+def is_translated(index):
+    return index % UNTRANSLATED_EVERY != UNTRANSLATED_EVERY - 1
+
+
+def catalog_text(locale, message_count):
+    lines = []
+    for term in range(TERM_COUNT):
+        lines.append(f"-brand-{term} = {locale.upper()} Brand {term}\n")
+    for i in range(message_count):
+        if locale != DEFAULT_LOCALE and not is_translated(i):
+            continue
+        id_template, value_template = MESSAGE_TEMPLATES[i % len(MESSAGE_TEMPLATES)]
+        message_id = id_template.format(i=i)
+        value = value_template.format(tag=f"[{locale}]", i=i, term=i % TERM_COUNT)
+        lines.append(f"{message_id} = {value}\n")
+    return "".join(lines)
+
+
+def write_catalog(base_dir, message_count, locale_count):
+    """
+    Writes a catalog with `message_count` messages in each of `locale_count`
+    locales to `base_dir`, returning the list of locales.
+    """
+    locales = LOCALES[:locale_count]
+    for locale in locales:
+        path = os.path.join(base_dir, locale, PATH)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(catalog_text(locale, message_count))
+    return locales
+
+
+class CatalogFinder(MessageFinderBase):
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+
+    @property
+    def locale_base_dirs(self):
+        return [self.base_dir]
@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+
+# Contention benchmarks, for seeing how `Bundle` scales when it is used from
+# many threads at once, compared with the same number of processes, and for
+# choosing worker and thread counts for a deployment.
+#
+# Every worker formats a random mix of messages in random locales, using a
+# synthetic catalog (see catalogs.py), in one of these scenarios:
+#
+# * hot - all locales compiled and all messages in the message cache.
+# * mixed - all locales compiled, but the message cache is smaller than the set
+#   of messages in use, so that many lookups take the slow path.
+# * cold - a new bundle, so workers race to compile locales. Threads share the
+#   compiled locales, so they do less work in total than processes.
+#
+# For each scenario and worker count, this reports throughput and its scaling
+# relative to one worker, latency percentiles, and the time spent waiting for
+# the locks in `Bundle`. Threads share one bundle, processes have one each.
+#
+# Usage (see --help for options):
+#
+#   ./tests/benchmarks/contention.py --threads=1,2,4,8 --processes=1,2,4,8
+#
+# This works with both normal and free-threaded CPython builds. The build and
+# whether the GIL is enabled are included in the report.
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import sysconfig
+import threading
+import time
+
+this_file = os.path.abspath(__file__)
+this_dir = os.path.dirname(this_file)
+root_dir = os.path.dirname(os.path.dirname(this_dir))
+
+SCENARIOS = ["hot", "mixed", "cold"]
+
+_allocate_lock = threading.Lock
+
+
+def setup():
+    for path in [os.path.join(root_dir, "src"), root_dir]:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+    import django
+
+    django.setup()
+
+    import django_ftl.bundles
+
+    # Measure waiting on all locks created by bundles.
+    django_ftl.bundles.Lock = TimedLock
+    # Errors for untranslated messages are expected, and would only add noise.
+    logging.getLogger("django_ftl.message_errors").setLevel(logging.CRITICAL)
+
+
+def runtime_info():
+    free_threaded_build = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    gil_enabled = True if is_gil_enabled is None else is_gil_enabled()
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "free_threaded_build": free_threaded_build,
+        "gil_enabled": gil_enabled,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# Lock wait times are collected per thread, so that recording them doesn't need
+# any locking itself.
+
+_lock_waits = threading.local()
+
+
+def reset_lock_waits():
+    _lock_waits.acquired = 0
+    _lock_waits.contended = 0
+    _lock_waits.seconds = 0.0
+
+
+def get_lock_waits():
+    return {
+        "acquired": getattr(_lock_waits, "acquired", 0),
+        "contended": getattr(_lock_waits, "contended", 0),
+        "seconds": getattr(_lock_waits, "seconds", 0.0),
+    }
+
+
+class TimedLock:
+    """
+    Drop in replacement for `threading.Lock` that records how long the current
+    thread waited to acquire it.
+    """
+
+    def __init__(self):
+        self._lock = _allocate_lock()
+
+    def acquire(self, blocking=True, timeout=-1):
+        if not hasattr(_lock_waits, "acquired"):
+            reset_lock_waits()
+        if self._lock.acquire(False):
+            _lock_waits.acquired += 1
+            return True
+        if not blocking:
+            return False
+        start = time.perf_counter()
+        acquired = self._lock.acquire(True, timeout)
+        _lock_waits.seconds += time.perf_counter() - start
+        _lock_waits.contended += 1
+        if acquired:
+            _lock_waits.acquired += 1
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+# Workloads
+
+
+def make_bundle(config):
+    from catalogs import CatalogFinder
+
+    from django_ftl.bundles import Bundle
+
+    kwargs = {}
+    if config["scenario"] == "mixed":
+        kwargs["message_cache_size"] = config["mixed_cache_size"]
+    if config["lazy_compile"]:
+        kwargs["lazy_compile"] = True
+    bundle = Bundle(
+        [config["path"]],
+        default_locale=config["default_locale"],
+        finder=CatalogFinder(config["base_dir"]),
+        auto_reload=False,
+        **kwargs,
+    )
+    if config["scenario"] != "cold":
+        from catalogs import MESSAGE_ARGS
+
+        from django_ftl import override
+
+        bundle.compile_locales(config["locales"])
+        for locale in config["locales"]:
+            with override(locale):
+                for message_id in config["message_ids"]:
+                    bundle.format(message_id, MESSAGE_ARGS)
+    return bundle
+
+
+def make_ops(config, worker_index):
+    rng = random.Random(config["seed"] + worker_index)
+    return [
+        (rng.choice(config["locales"]), rng.choice(config["message_ids"]))
+        for i in range(config["ops"])
+    ]
+
+
+def run_worker(bundle, ops, barrier, clock=time.perf_counter):
+    # `clock` gives the start and end times, which are compared across workers,
+    # so it must be shared by them - perf_counter isn't across processes.
+    from catalogs import MESSAGE_ARGS
+
+    from django_ftl import activate
+
+    format = bundle.format
+    perf_counter = time.perf_counter
+    latencies = []
+    reset_lock_waits()
+    barrier.wait()
+    start = clock()
+    for locale, message_id in ops:
+        activate(locale)
+        op_start = perf_counter()
+        format(message_id, MESSAGE_ARGS)
+        latencies.append(perf_counter() - op_start)
+    end = clock()
+    return {
+        "start": start,
+        "end": end,
+        "seconds": end - start,
+        "latencies": latencies,
+        "lock_waits": get_lock_waits(),
+    }
+
+
+def run_threads(config, count):
+    bundle = make_bundle(config)
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def target(index):
+        results[index] = run_worker(bundle, make_ops(config, index), barrier)
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def process_main(config, index, barrier, queue):
+    setup()
+    bundle = make_bundle(config)
+    queue.put(run_worker(bundle, make_ops(config, index), barrier, clock=time.time))
+
+
+def run_processes(config, count):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(count)
+    queue = context.Queue()
+    processes = [
+        context.Process(target=process_main, args=(config, i, barrier, queue))
+        for i in range(count)
+    ]
+    for process in processes:
+        process.start()
+    results = [queue.get() for process in processes]
+    for process in processes:
+        process.join()
+    return results
+
+
+# Reporting
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(results):
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    # A worker's own time understates the elapsed time if workers don't run in
+    # parallel (e.g. threads with the GIL), so we use the overall span.
+    seconds = max(r["end"] for r in results) - min(r["start"] for r in results)
+    lock_seconds = sum(result["lock_waits"]["seconds"] for result in results)
+    worker_seconds = sum(result["seconds"] for result in results)
+    return {
+        "workers": len(results),
+        "ops": len(latencies),
+        "seconds": seconds,
+        "throughput": len(latencies) / seconds if seconds else 0.0,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else 0.0,
+        "lock_acquired": sum(r["lock_waits"]["acquired"] for r in results),
+        "lock_contended": sum(r["lock_waits"]["contended"] for r in results),
+        "lock_wait_seconds": lock_seconds,
+        "lock_wait_fraction": lock_seconds / worker_seconds if worker_seconds else 0.0,
+    }
+
+
+def format_report(info, config, rows):
+    lines = [
+        f"Python {info['python']} ({info['implementation']}), "
+        f"{'free-threaded' if info['free_threaded_build'] else 'standard'} build, "
+        f"GIL {'enabled' if info['gil_enabled'] else 'disabled'}, "
+        f"{info['cpu_count']} CPUs",
+        f"Catalog: {config['messages']} messages, {len(config['locales'])} locales, "
+        f"{len(config['message_ids'])} messages in use, "
+        f"{config['ops']} formats per worker"
+        + (", lazy compile" if config["lazy_compile"] else ""),
+        "",
+        f"{'scenario':<8} {'mode':<9} {'workers':>7} {'ops/s':>11} {'scaling':>8} "
+        f"{'p50 us':>8} {'p99 us':>9} {'max ms':>9} {'lock wait':>10}",
+    ]
+    baselines = {}
+    for row in rows:
+        key = (row["scenario"], row["mode"])
+        baseline = baselines.setdefault(key, row["throughput"])
+        scaling = row["throughput"] / baseline if baseline else 0.0
+        lines.append(
+            f"{row['scenario']:<8} {row['mode']:<9} {row['workers']:>7} "
+            f"{row['throughput']:>11,.0f} {scaling:>7.2f}x "
+            f"{row['p50'] * 1e6:>8.1f} {row['p99'] * 1e6:>9.1f} "
+            f"{row['max'] * 1e3:>9.2f} {row['lock_wait_fraction']:>9.1%}"
+        )
+    lines += [
+        "",
+        "scaling: throughput relative to the first row for the scenario and mode.",
+        "lock wait: share of worker time spent waiting for Bundle locks.",
+    ]
+    return "\n".join(lines)
+
+
+def parse_counts(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--threads", type=parse_counts, default=[1, 2, 4, 8], help="e.g. 1,2,4,8"
+    )
+    parser.add_argument(
+        "--processes", type=parse_counts, default=[1, 2, 4, 8], help="e.g. 1,2,4,8"
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=SCENARIOS,
+        help="Scenario to run, can be repeated. Defaults to all.",
+    )
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--locales", type=int, default=4)
+    parser.add_argument(
+        "--working-set", type=int, default=200, help="Number of messages used"
+    )
+    parser.add_argument("--ops", type=int, default=20000, help="Formats per worker")
+    parser.add_argument("--lazy-compile", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write results to this file, as JSON")
+    args = parser.parse_args(argv)
+
+    import tempfile
+
+    from catalogs import DEFAULT_LOCALE, PATH, message_ids, write_catalog
+
+    setup()
+    with tempfile.TemporaryDirectory() as base_dir:
+        locales = write_catalog(base_dir, args.messages, max(args.locales, 1))
+        all_ids = message_ids(args.messages)
+        config = {
+            "base_dir": base_dir,
+            "path": PATH,
+            "default_locale": DEFAULT_LOCALE,
+            "locales": locales,
+            "messages": args.messages,
+            "message_ids": random.Random(args.seed).sample(
+                all_ids, min(args.working_set, len(all_ids))
+            ),
+            "mixed_cache_size": max(args.working_set * len(locales) // 4, 1),
+            "ops": args.ops,
+            "lazy_compile": args.lazy_compile,
+            "seed": args.seed,
+        }
+        rows = []
+        for scenario in args.scenario or SCENARIOS:
+            for mode, counts, run in [
+                ("threads", args.threads, run_threads),
+                ("processes", args.processes, run_processes),
+            ]:
+                for count in counts:
+                    print(f"Running {scenario} with {count} {mode}...", file=sys.stderr)
+                    results = run(dict(config, scenario=scenario), count)
+                    rows.append(dict(summarize(results), scenario=scenario, mode=mode))
+
+    info = runtime_info()
+    print(format_report(info, config, rows))
+    if args.json:
+        del config["base_dir"]
+        with open(args.json, "w") as f:
+            json.dump({"runtime": info, "config": config, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
 simple-string = Hello I am a simple string
 
 simple-string-present-in-fallback = Hello I am a simple string present in fallback
+
+greeting = Hello { $name }, welcome back
@@ -0,0 +1,237 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from django.core.signals import request_started
+from django.test import override_settings
+
+from django_ftl import activate
+from django_ftl.autoreload import StatWatcher
+from django_ftl.bundles import Bundle
+
+from .base import TempDirFinder, TestBase
+
+try:
+    import pyinotify
+except ImportError:
+    pyinotify = None
+
+try:
+    from django.utils.autoreload import file_changed
+except ImportError:
+    # Django < 2.2
+    file_changed = None
+
+
+class TestReloadLocale(TestBase):
+    def test_only_locale_reloaded(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", auto_reload=False)
+        activate("fr-FR")
+        self.assertEqual(bundle.format("simple"), "Facile")
+        activate("tr")
+        self.assertEqual(bundle.format("simple"), "Basit")
+        fr_unit = bundle._compiled_unit_for_locale["fr-fr"]
+
+        bundle.reload_locale("tr")
+        self.assertNotIn("tr", bundle._compiled_unit_for_locale)
+        self.assertIs(bundle._compiled_unit_for_locale["fr-fr"], fr_unit)
+        self.assertEqual(list(bundle._message_function_cache), [("fr-fr", "simple")])
+        self.assertEqual(bundle.format("simple"), "Basit")
+
+    def test_fallback_locale_reloaded(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", auto_reload=False)
+        activate("fr-FR")
+        bundle.format("simple")
+        activate("tr")
+        bundle.format("simple")
+
+        # 'en' is the fallback for every locale
+        bundle.reload_locale("en")
+        self.assertEqual(bundle._message_function_cache, {})
+        self.assertEqual(bundle._available_units_for_locale, {})
+        self.assertIn("fr-fr", bundle._compiled_unit_for_locale)
+
+
+class AutoReloadTests:
+    def setUp(self):
+        super().setUp()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.base_dir = self._tmpdir.name
+        self.write("en", "simple = Simple\nother = Other\n")
+        self.write("en", "extra = Extra\n", name="extra.ftl")
+        self.write("tr", "simple = Basit\n")
+        self.write("tr", "extra = Ekstra\n", name="extra.ftl")
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+        super().tearDown()
+
+    def write(self, locale, text, name="main.ftl"):
+        locale_dir = os.path.join(self.base_dir, locale, "app")
+        os.makedirs(locale_dir, exist_ok=True)
+        path = os.path.join(locale_dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_changed_file_reloaded(self):
+        finder = TempDirFinder(self.base_dir)
+        bundle = Bundle(
+            ["app/main.ftl", "app/extra.ftl"],
+            default_locale="en",
+            finder=finder,
+            auto_reload=True,
+        )
+        activate("tr")
+        self.assertEqual(bundle.format("simple"), "Basit")
+        en_unit = bundle._compiled_unit_for_locale["en"]
+
+        self.write("tr", "simple = Basit 2\n")
+        with mock.patch.object(finder, "load", wraps=finder.load) as load:
+            request_started.send(sender=None)
+            self.assertEqual(bundle.format("simple"), "Basit 2")
+        # Only the changed file is read again
+        self.assertEqual(
+            [c[0][:2] for c in load.call_args_list], [("tr", "app/main.ftl")]
+        )
+        self.assertIs(bundle._compiled_unit_for_locale["en"], en_unit)
+
+        # And watched again
+        self.write("tr", "simple = Basit 333\n")
+        request_started.send(sender=None)
+        self.assertEqual(bundle.format("simple"), "Basit 333")
+
+    def test_new_locale_picked_up(self):
+        bundle = Bundle(
+            ["app/main.ftl", "app/extra.ftl"],
+            default_locale="en",
+            finder=TempDirFinder(self.base_dir),
+            auto_reload=True,
+        )
+        activate("de")
+        self.assertEqual(bundle.format("simple"), "Simple")
+
+        self.write("de", "simple = Einfach\n")
+        request_started.send(sender=None)
+        self.assertEqual(bundle.format("simple"), "Einfach")
+
+    def test_new_file_picked_up(self):
+        os.unlink(os.path.join(self.base_dir, "tr", "app", "extra.ftl"))
+        bundle = Bundle(
+            ["app/main.ftl", "app/extra.ftl"],
+            default_locale="en",
+            finder=TempDirFinder(self.base_dir),
+            auto_reload=True,
+        )
+        activate("tr")
+        self.assertEqual(bundle.format("extra"), "Extra")
+
+        self.write("tr", "extra = Ekstra\n", name="extra.ftl")
+        request_started.send(sender=None)
+        self.assertEqual(bundle.format("extra"), "Ekstra")
+
+    def test_watcher_shared(self):
+        bundles = [
+            Bundle(
+                ["app/main.ftl"],
+                default_locale="en",
+                finder=TempDirFinder(self.base_dir),
+                auto_reload=True,
+            )
+            for i in range(3)
+        ]
+        activate("tr")
+        for bundle in bundles:
+            bundle.format("simple")
+        self.assertEqual(len({bundle._reloader.watcher for bundle in bundles}), 1)
+
+        self.write("tr", "simple = Basit 2\n")
+        request_started.send(sender=None)
+        self.assertEqual(
+            [bundle.format("simple") for bundle in bundles], ["Basit 2"] * 3
+        )
+
+
+@unittest.skipIf(pyinotify is None, "pyinotify not installed")
+@override_settings(FTL={"AUTO_RELOAD_BACKEND": "inotify"})
+class TestInotifyAutoReload(AutoReloadTests, TestBase):
+    pass
+
+
+@override_settings(FTL={"AUTO_RELOAD_BACKEND": "stat", "AUTO_RELOAD_POLL_INTERVAL": 0})
+class TestStatAutoReload(AutoReloadTests, TestBase):
+    def test_batches(self):
+        watcher = StatWatcher(interval=0, batch_size=2)
+        self.addCleanup(request_started.disconnect, watcher.new_request)
+        watcher.watch_base_dir(self.base_dir)
+        # base dir, en, en/app, tr, tr/app
+        self.assertEqual(len(watcher.paths), 5)
+        with mock.patch.object(watcher, "list_dir", wraps=watcher.list_dir) as list_dir:
+            request_started.send(sender=None)
+            self.assertEqual(list_dir.call_count, 2)
+            request_started.send(sender=None)
+            request_started.send(sender=None)
+            # Wrapped round to the start
+            self.assertEqual(list_dir.call_count, 6)
+
+    def test_interval(self):
+        watcher = StatWatcher(interval=60)
+        self.addCleanup(request_started.disconnect, watcher.new_request)
+        watcher.watch_base_dir(self.base_dir)
+        with mock.patch.object(watcher, "check") as check:
+            request_started.send(sender=None)
+        check.assert_not_called()
+
+
+@override_settings(FTL={"AUTO_RELOAD_BACKEND": "django"})
+@unittest.skipIf(file_changed is None, "Django autoreloader signals need Django 2.2+")
+class TestDjangoAutoReload(AutoReloadTests, TestBase):
+    def test_changed_file_reloaded(self):
+        django_reloader = mock.Mock()
+        bundle = Bundle(
+            ["app/main.ftl", "app/extra.ftl"],
+            default_locale="en",
+            finder=TempDirFinder(self.base_dir),
+            auto_reload=True,
+        )
+        activate("tr")
+        self.assertEqual(bundle.format("simple"), "Basit")
+        bundle._reloader.watcher.autoreload_started(sender=django_reloader)
+        django_reloader.watch_dir.assert_any_call(self.base_dir, "**/*.ftl")
+
+        path = self.write("tr", "simple = Basit 2\n")
+        results = file_changed.send(sender=django_reloader, file_path=Path(path))
+        # Returning True stops Django from restarting the server.
+        self.assertIn(True, [r[1] for r in results])
+        self.assertEqual(bundle.format("simple"), "Basit 2")
+
+    def test_new_locale_picked_up(self):
+        self.skipTest("Django's StatReloader doesn't report new files")
+
+    def test_new_file_picked_up(self):
+        self.skipTest("Django's StatReloader doesn't report new files")
+
+    def test_watcher_shared(self):
+        django_reloader = mock.Mock()
+        bundles = [
+            Bundle(
+                ["app/main.ftl"],
+                default_locale="en",
+                finder=TempDirFinder(self.base_dir),
+                auto_reload=True,
+            )
+            for i in range(3)
+        ]
+        activate("tr")
+        for bundle in bundles:
+            bundle.format("simple")
+        self.assertEqual(len({bundle._reloader.watcher for bundle in bundles}), 1)
+        bundles[0]._reloader.watcher.autoreload_started(sender=django_reloader)
+
+        path = self.write("tr", "simple = Basit 2\n")
+        file_changed.send(sender=django_reloader, file_path=Path(path))
+        self.assertEqual(
+            [bundle.format("simple") for bundle in bundles], ["Basit 2"] * 3
+        )
@@ -1,7 +1,14 @@
+import asyncio
+import os
 import os.path
 import platform
+import tempfile
 import threading
 import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from unittest import mock
 
 from django.test import override_settings
 
@@ -10,13 +17,17 @@ try:
 except ImportError:
     from django.utils.encoding import force_str
 
+from babel.core import UnknownLocaleError
+from django.utils.safestring import SafeString
 from fluent_compiler.errors import FluentJunkFound
+from fluent_compiler.resource import FtlResource
 from testfixtures import LogCapture
 
-from django_ftl import activate, deactivate, override
+from django_ftl import activate, activator, bundles, deactivate, override
 from django_ftl.bundles import Bundle, FileNotFoundError, NoLocaleSet, locale_lookups
+from django_ftl.compilation import compile_code, load_code
 
-from .base import TestBase
+from .base import TempDirFinder, TestBase
 
 
 class TestBundles(TestBase):
@@ -231,7 +242,9 @@ class TestBundles(TestBase):
             bundle_2.format("with-argument", {"user": "Horace"}), "Hello to Horace."
         )
 
+    @override_settings(FTL={"ERROR_LOG_INTERVAL": 0})
     def test_logged_runtime_errors(self):
+        # Repeated errors are logged every time with ERROR_LOG_INTERVAL = 0
         bundle = Bundle(["tests/main.ftl"], default_locale="en")
 
         def run(locale_expected):
@@ -276,6 +289,54 @@ class TestBundles(TestBase):
             "NUMBER() got an unexpected keyword argument 'xxx'",
         )
 
+    def test_format_many(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", use_isolating=False)
+        activate("tr")
+        self.assertEqual(
+            bundle.format_many(
+                [
+                    "simple",
+                    ("with-argument", {"user": "Horace"}),
+                    "missing-from-others",
+                ]
+            ),
+            {
+                "simple": "Basit",
+                "with-argument": "Hello to Horace.",
+                "missing-from-others": "Missing from others",
+            },
+        )
+
+    def test_format_many_errors(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", use_isolating=False)
+        with LogCapture() as log:
+            self.assertEqual(
+                bundle.format_many(["with-argument", "with-number-argument"]),
+                {
+                    "with-argument": "Hello to user.",
+                    "with-number-argument": "Score: points",
+                },
+            )
+        self.assertEqual(
+            [r.getMessage().split(",")[1] for r in log.records],
+            [" message 'with-argument'", " message 'with-number-argument'"],
+        )
+
+    def test_format_many_duplicate_ids(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        self.assertRaises(
+            ValueError,
+            bundle.format_many,
+            [
+                ("with-number-argument", {"points": 1}),
+                ("with-number-argument", {"points": 2}),
+            ],
+        )
+
+    def test_format_many_require_activate(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", require_activate=True)
+        self.assertRaises(NoLocaleSet, bundle.format_many, ["simple"])
+
     def test_custom_functions(self):
         def os_name():
             return platform.system()
@@ -286,6 +347,587 @@ class TestBundles(TestBase):
         assert bundle.format("hello") == "Hello {} user!".format(platform.system())
 
 
+class TestMessageFunctionCache(TestBase):
+    def test_locale_spellings_share_entries(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        for locale in ["fr-FR", "fr_FR", "FR-fr", "fr-fr"]:
+            activate(locale)
+            self.assertEqual(bundle.format("simple"), "Facile")
+        self.assertEqual(list(bundle._message_function_cache), [("fr-fr", "simple")])
+
+    def test_fifo_bounded(self):
+        bundle = Bundle(
+            ["tests/main.ftl"],
+            default_locale="en",
+            message_cache_size=3,
+            message_cache_policy="fifo",
+        )
+        with LogCapture():
+            for i in range(10):
+                bundle.format(f"missing-{i}")
+        self.assertEqual(
+            list(bundle._message_function_cache),
+            [(None, "missing-7"), (None, "missing-8"), (None, "missing-9")],
+        )
+
+    def test_lru_bounded(self):
+        bundle = Bundle(
+            ["tests/main.ftl"],
+            default_locale="en",
+            message_cache_size=4,
+            message_cache_policy="lru",
+        )
+        with mock.patch.object(
+            bundle, "_find_message_function", wraps=bundle._find_message_function
+        ) as find_message_function:
+            with LogCapture():
+                bundle.format("a")
+                bundle.format("b")
+                bundle.format("c")
+                # Promoted from previous generation:
+                bundle.format("a")
+                bundle.format("d")
+        self.assertEqual(find_message_function.call_count, 4)
+        self.assertEqual(
+            set(bundle._message_function_cache)
+            | set(bundle._previous_message_function_cache),
+            {(None, "c"), (None, "a"), (None, "d")},
+        )
+
+    @override_settings(FTL={"MESSAGE_CACHE_SIZE": None})
+    def test_unbounded(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        with LogCapture():
+            for i in range(20000):
+                bundle.format(f"missing-{i}")
+        self.assertEqual(len(bundle._message_function_cache), 20000)
+
+    def test_bad_policy(self):
+        self.assertRaises(
+            ValueError,
+            Bundle,
+            ["tests/main.ftl"],
+            message_cache_policy="xxx",
+        )
+
+
+class TestResultCache(TestBase):
+    def test_disabled_by_default(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        bundle.format("with-argument", {"user": "Horace"})
+        self.assertEqual(bundle.result_cache_info(), (0, 0, 0, 0))
+
+    def test_hits_and_misses(self):
+        bundle = Bundle(
+            ["tests/main.ftl"],
+            default_locale="en",
+            use_isolating=False,
+            result_cache_size=10,
+        )
+        for i in range(3):
+            self.assertEqual(
+                bundle.format("with-argument", {"user": "Horace"}), "Hello to Horace."
+            )
+        self.assertEqual(
+            bundle.format("with-argument", {"user": "Jane"}), "Hello to Jane."
+        )
+        activate("fr-FR")
+        self.assertEqual(
+            bundle.format("with-argument", {"user": "Horace"}), "Bonjour à Horace."
+        )
+        info = bundle.result_cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (2, 3, 3))
+
+    def test_types_part_of_key(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", result_cache_size=10)
+        bundle.format("with-number-argument", {"points": 1})
+        bundle.format("with-number-argument", {"points": 1.0})
+        self.assertEqual(bundle.result_cache_info().misses, 2)
+
+    def test_only_scalar_args_cached(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", result_cache_size=10)
+        bundle.format("with-number-argument", {"points": 1.5})
+        bundle.format("with-number-argument", {"points": 1.5})
+        info = bundle.result_cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (0, 2, 0))
+
+    def test_equal_datetimes_not_cached(self):
+        # Equal datetimes in different timezones format differently.
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        os.makedirs(os.path.join(tmpdir.name, "en"))
+        with open(os.path.join(tmpdir.name, "en", "dates.ftl"), "w") as f:
+            f.write('time = { DATETIME($when, timeStyle: "short") }\n')
+        bundle = Bundle(
+            ["dates.ftl"],
+            default_locale="en",
+            finder=TempDirFinder(tmpdir.name),
+            use_isolating=False,
+            result_cache_size=10,
+        )
+        utc = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+        plus_five = utc.astimezone(timezone(timedelta(hours=5)))
+        self.assertEqual(utc, plus_five)
+        self.assertNotEqual(
+            bundle.format("time", {"when": utc}),
+            bundle.format("time", {"when": plus_five}),
+        )
+        self.assertEqual(bundle.result_cache_info().currsize, 0)
+
+    def test_unhashable_args(self):
+        bundle = Bundle(
+            ["tests/main.ftl"],
+            default_locale="en",
+            use_isolating=False,
+            result_cache_size=10,
+        )
+        self.assertEqual(
+            bundle.format("with-argument", {"user": "Horace", "x": []}),
+            "Hello to Horace.",
+        )
+        self.assertEqual(bundle.result_cache_info().currsize, 0)
+
+    @override_settings(FTL={"ERROR_LOG_INTERVAL": 0})
+    def test_errors_not_cached(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", result_cache_size=10)
+        for i in range(2):
+            with LogCapture() as log:
+                bundle.format("with-argument", {})
+            self.assertEqual(len(log.records), 1)
+        self.assertEqual(bundle.result_cache_info().currsize, 0)
+
+    def test_bounded(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", result_cache_size=3)
+        for i in range(10):
+            bundle.format("with-number-argument", {"points": i})
+        self.assertEqual(bundle.result_cache_info().currsize, 3)
+
+    def test_reload_clears(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", result_cache_size=3)
+        bundle.format("with-number-argument", {"points": 1})
+        bundle.reload()
+        self.assertEqual(bundle.result_cache_info().currsize, 0)
+
+    @override_settings(FTL={"RESULT_CACHE_SIZE": 100})
+    def test_from_settings(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        self.assertEqual(
+            bundle.format_many([("with-number-argument", {"points": 1})]),
+            {"with-number-argument": "Score: \u20681\u2069"},
+        )
+        self.assertEqual(bundle.result_cache_info().maxsize, 100)
+        self.assertEqual(bundle.result_cache_info().currsize, 1)
+
+
+class TestLocaleResolution(TestBase):
+    def test_unknown_locale_not_compiled(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        activate("xx")
+        with mock.patch(
+            "django_ftl.bundles.compile_code", wraps=compile_code
+        ) as compile_code_mock, LogCapture("django_ftl.bundles") as log:
+            self.assertEqual(bundle.format("simple"), "Simple")
+            self.assertEqual(
+                bundle.format("missing-from-others"), "Missing from others"
+            )
+            activate("xx-YY")
+            self.assertEqual(bundle.format("simple"), "Simple")
+        self.assertEqual([c[0][0] for c in compile_code_mock.call_args_list], ["en"])
+        self.assertEqual(
+            [r.getMessage() for r in log.records],
+            [
+                "Skipping locale 'xx' for <Bundle ['tests/main.ftl']>: "
+                "UnknownLocaleError(\"unknown locale 'xx'\")",
+                "Skipping locale 'xx-yy' for <Bundle ['tests/main.ftl']>: "
+                "UnknownLocaleError(\"unknown locale 'xx_YY'\")",
+            ],
+        )
+
+    def test_invalid_locale(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        activate("en-US-x-private1")
+        self.assertEqual(bundle.format("simple"), "Simple")
+
+    def test_unknown_default_locale(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        os.makedirs(os.path.join(tmpdir.name, "xx", "app"))
+        with open(os.path.join(tmpdir.name, "xx", "app", "main.ftl"), "w") as f:
+            f.write("simple = Simple\n")
+        bundle = Bundle(
+            ["app/main.ftl"],
+            default_locale="xx",
+            finder=TempDirFinder(tmpdir.name),
+            auto_reload=False,
+        )
+        self.assertRaises(UnknownLocaleError, bundle.format, "simple")
+
+    def test_errors_not_hidden(self):
+        def broken(*args, **kwargs):
+            raise ValueError("broken")
+
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        activate("tr")
+        with mock.patch.object(bundle._finder, "load", broken):
+            self.assertRaises(ValueError, bundle.format, "simple")
+
+    def test_missing_locale_skipped(self):
+        # There are no FTL files for 'de', so no errors should be logged
+        # about messages missing from it.
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        activate("de")
+        with LogCapture() as log:
+            self.assertEqual(bundle.format("simple"), "Simple")
+        log.check()
+        self.assertEqual([u.locale for u in bundle._get_available_units("de")], ["en"])
+
+    def test_reload_clears(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        activate("xx")
+        bundle.format("simple")
+        self.assertIn("xx", bundle._unavailable_locales)
+        self.assertIn("xx", bundle._available_units_for_locale)
+        bundle.reload()
+        self.assertEqual(bundle._unavailable_locales, set())
+        self.assertEqual(bundle._available_units_for_locale, {})
+
+
+class TestConstantMessages(TestBase):
+    def test_constants_found(self):
+        resource = FtlResource.from_string("""
+simple = Simple
+message-ref = { simple } and more
+term-ref = { -brand }
+-brand = Brand
+escaped-html = <b>Bold</b>
+with-argument = Hello { $user }
+number = { NUMBER(1) }
+function = { OSNAME() }
+missing-ref = { missing }
+""")
+        options = dict(
+            functions={"OSNAME": platform.system}, escapers=[bundles.html_escaper]
+        )
+        unit = load_code(compile_code("en", [resource], **options), **options)
+        self.assertEqual(
+            unit.message_constants,
+            {
+                "simple": "Simple",
+                "message-ref": "\u2068Simple\u2069 and more",
+                "term-ref": "Brand",
+                "escaped-html": "<b>Bold</b>",
+            },
+        )
+        self.assertIsInstance(unit.message_constants["escaped-html"], SafeString)
+
+    def test_format_uses_constants(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        self.assertEqual(bundle.format("simple"), "Simple")
+        self.assertEqual(bundle._message_function_cache[None, "simple"], "Simple")
+        self.assertEqual(
+            bundle.format_many(["simple", "missing-from-others"]),
+            {"simple": "Simple", "missing-from-others": "Missing from others"},
+        )
+
+
+class TestMessageFinder(TestBase):
+    def setUp(self):
+        super().setUp()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.base_dir = self._tmpdir.name
+
+    def write(self, base_dir, locale, text, path="app/main.ftl"):
+        full_path = os.path.join(base_dir, locale, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(text)
+        return full_path
+
+    def test_single_scan(self):
+        self.write(self.base_dir, "en", "simple = Simple")
+        self.write(self.base_dir, "fr-FR", "simple = Facile", path="app/sub/x.ftl")
+        finder = TempDirFinder(self.base_dir)
+        with mock.patch("os.scandir", wraps=os.scandir) as scandir:
+            finder.load("en", "app/main.ftl")
+            finder.load("fr-fr", "app/sub/x.ftl")
+            self.assertEqual(finder.available_locales(), {"en", "fr-fr"})
+        # base, en, en/app, fr-FR, fr-FR/app, fr-FR/app/sub
+        self.assertEqual(scandir.call_count, 6)
+        self.assertRaises(FileNotFoundError, finder.load, "tr", "app/main.ftl")
+
+    def test_base_dir_priority(self):
+        other_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(other_dir.cleanup)
+        self.write(self.base_dir, "en", "simple = First")
+        self.write(other_dir.name, "en", "simple = Second")
+        self.write(other_dir.name, "en", "other = Other", path="app/other.ftl")
+
+        class Finder(bundles.MessageFinderBase):
+            locale_base_dirs = [self.base_dir, other_dir.name]
+
+        finder = Finder()
+        self.assertEqual(finder.load("en", "app/main.ftl").text, "simple = First")
+        self.assertEqual(finder.load("en", "app/other.ftl").text, "other = Other")
+
+    def test_invalidate(self):
+        finder = TempDirFinder(self.base_dir)
+        self.assertEqual(finder.available_locales(), set())
+        self.write(self.base_dir, "tr", "simple = Basit")
+        self.assertRaises(FileNotFoundError, finder.load, "tr", "app/main.ftl")
+        finder.invalidate()
+        self.assertEqual(finder.load("tr", "app/main.ftl").text, "simple = Basit")
+
+    def test_bundle_reload(self):
+        self.write(self.base_dir, "en", "simple = Simple")
+        bundle = Bundle(
+            ["app/main.ftl"],
+            default_locale="en",
+            finder=TempDirFinder(self.base_dir),
+            auto_reload=False,
+        )
+        activate("tr")
+        self.assertEqual(bundle.format("simple"), "Simple")
+        self.write(self.base_dir, "tr", "simple = Basit")
+        bundle.reload()
+        self.assertEqual(bundle.format("simple"), "Basit")
+
+    @unittest.skipIf(not hasattr(os, "symlink"), "symlinks not supported")
+    def test_symlink_loop(self):
+        self.write(self.base_dir, "en", "simple = Simple")
+        os.symlink(
+            os.path.join(self.base_dir, "en"),
+            os.path.join(self.base_dir, "en", "app", "loop"),
+        )
+        finder = TempDirFinder(self.base_dir)
+        self.assertEqual(finder.load("en", "app/main.ftl").text, "simple = Simple")
+        self.assertEqual(
+            sorted(path for locale, path in finder.index), ["app/main.ftl"]
+        )
+
+    def test_removed_file(self):
+        path = self.write(self.base_dir, "tr", "simple = Basit")
+        finder = TempDirFinder(self.base_dir)
+        finder.load("tr", "app/main.ftl")
+        os.unlink(path)
+        with self.assertRaises(FileNotFoundError) as cm:
+            finder.load("tr", "app/main.ftl")
+        self.assertIn(path, str(cm.exception))
+
+    def test_django_finder(self):
+        finder = bundles.DjangoMessageFinder()
+        self.assertTrue({"en", "fr-fr", "tr"} <= finder.available_locales())
+
+
+class TestLazyCompile(TestBase):
+    def setUp(self):
+        super().setUp()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        os.makedirs(os.path.join(self._tmpdir.name, "en", "app"))
+        with open(os.path.join(self._tmpdir.name, "en", "app", "main.ftl"), "w") as f:
+            f.write("""
+-brand = Acme
+hello = Hello { -brand }
+reference = { hello }!
+other = Other
+with-attribute = Value
+    .title = Title { -brand }
+uses-error = { has-error }
+has-error = { NUMBER(1, xxx: 2) }
+""")
+        self.bundle = Bundle(
+            ["app/main.ftl"],
+            default_locale="en",
+            finder=TempDirFinder(self._tmpdir.name),
+            use_isolating=False,
+            auto_reload=False,
+            lazy_compile=True,
+        )
+
+    def compiled_ids(self):
+        unit = self.bundle.get_compiled_unit_for_locale("en")
+        return set(unit.message_functions._functions)
+
+    def test_compiled_on_use(self):
+        self.assertEqual(self.compiled_ids(), set())
+        self.assertEqual(self.bundle.format("other"), "Other")
+        self.assertEqual(self.compiled_ids(), {"other"})
+
+    def test_dependencies(self):
+        self.assertEqual(self.bundle.format("reference"), "Hello Acme!")
+        self.assertEqual(self.compiled_ids(), {"reference", "hello"})
+        self.assertEqual(self.bundle.format("hello"), "Hello Acme")
+
+    def test_attributes(self):
+        self.assertEqual(self.bundle.format("with-attribute.title"), "Title Acme")
+        self.assertEqual(self.bundle.format("with-attribute"), "Value")
+        self.assertEqual(
+            self.compiled_ids(), {"with-attribute", "with-attribute.title"}
+        )
+
+    def test_missing(self):
+        with LogCapture() as log:
+            self.assertEqual(self.bundle.format("missing"), "???")
+        self.assertIn("KeyError('missing')", log.records[0].getMessage())
+        unit = self.bundle.get_compiled_unit_for_locale("en")
+        self.assertIn("hello", unit.message_functions)
+        self.assertNotIn("-brand", unit.message_functions)
+        self.assertEqual(len(unit.message_functions), 7)
+
+    def test_errors(self):
+        unit = self.bundle.get_compiled_unit_for_locale("en")
+        self.assertEqual(unit.errors, [])
+        self.bundle.format("uses-error")
+        self.bundle.format("has-error")
+        self.assertEqual([message_id for message_id, e in unit.errors], ["has-error"])
+
+        errors = self.bundle.check_all(["en"])
+        self.assertEqual([message_id for message_id, e in errors], ["has-error"])
+        self.assertIsInstance(errors[0][1], TypeError)
+
+    def test_check_all(self):
+        bundle = Bundle(["tests/errors.ftl"], default_locale="en", lazy_compile=True)
+        self.assertEqual(
+            [(message_id, type(e)) for message_id, e in bundle.check_all(["en"])],
+            [(None, FluentJunkFound), ("this-has-an-error", TypeError)],
+        )
+
+    def test_same_output(self):
+        lazy = Bundle(["tests/main.ftl"], default_locale="en", lazy_compile=True)
+        eager = Bundle(["tests/main.ftl"], default_locale="en")
+        args = {"user": "Jane", "points": 1234}
+        message_ids = list(eager.get_compiled_unit_for_locale("en").message_functions)
+        for locale in ["en", "fr-FR", "tr"]:
+            activate(locale)
+            for message_id in message_ids:
+                self.assertEqual(
+                    lazy.format(message_id, args), eager.format(message_id, args)
+                )
+
+
+class TestCompiledLocaleEviction(TestBase):
+    def test_least_recently_activated_evicted(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        for locale in ["en", "de", "es", "tr"]:
+            os.makedirs(os.path.join(tmpdir.name, locale, "app"))
+            with open(os.path.join(tmpdir.name, locale, "app", "main.ftl"), "w") as f:
+                f.write(f"simple = {locale}\n")
+        bundle = Bundle(
+            ["app/main.ftl"],
+            default_locale="en",
+            finder=TempDirFinder(tmpdir.name),
+            auto_reload=False,
+            max_compiled_locales=3,
+        )
+        for locale in ["de", "es", "de", "tr"]:
+            activate(locale)
+            self.assertEqual(bundle.format("simple"), locale)
+        self.assertEqual(set(bundle._compiled_unit_for_locale), {"en", "de", "tr"})
+
+    def test_locales_without_files_evicted_first(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", max_compiled_locales=3)
+        activate("tr")
+        bundle.format("simple")
+        activate("fr-FR")
+        bundle.format("simple")
+        # 'fr' has no files
+        self.assertEqual(set(bundle._compiled_unit_for_locale), {"en", "tr", "fr-fr"})
+
+    def test_caches_cleared(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", max_compiled_locales=2)
+        activate("tr")
+        self.assertEqual(bundle.format("simple"), "Basit")
+        activate("fr-FR")
+        self.assertEqual(bundle.format("simple"), "Facile")
+        self.assertNotIn("tr", bundle._compiled_unit_for_locale)
+        self.assertNotIn(("tr", "simple"), bundle._message_function_cache)
+        self.assertNotIn("tr", bundle._available_units_for_locale)
+
+        activate("tr")
+        self.assertEqual(bundle.format("simple"), "Basit")
+
+    def test_pinned(self):
+        bundle = Bundle(
+            ["tests/main.ftl"],
+            default_locale="en",
+            max_compiled_locales=1,
+            pinned_locales=["tr"],
+        )
+        activate("tr")
+        bundle.format("simple")
+        for locale in ["fr-FR", "de"]:
+            activate(locale)
+            bundle.format("simple")
+        self.assertEqual(set(bundle._compiled_unit_for_locale), {"en", "tr"})
+
+    @override_settings(FTL={"MAX_COMPILED_LOCALES": 1})
+    def test_setting(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        bundle.compile_locales(["en", "tr", "fr-FR"])
+        self.assertEqual(set(bundle._compiled_unit_for_locale), {"en", "fr-fr"})
+
+    def test_compile_locales_already_compiled(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", max_compiled_locales=2)
+        activate("tr")
+        bundle.format("simple")
+        activate("fr-FR")
+        bundle.format("simple")
+        # Compiling 'tr' again evicts 'fr-fr' before it is returned.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            units = bundle.compile_locales(["tr", "fr-fr"], executor=executor)
+        self.assertEqual(list(units), ["tr", "fr-fr"])
+        self.assertEqual(units["fr-fr"].locale, "fr-fr")
+
+    def test_activations_not_tracked_by_default(self):
+        with mock.patch.object(activator, "track_activations", False), mock.patch(
+            "django_ftl.bundles._last_activated", {}
+        ) as last_activated:
+            Bundle(["tests/main.ftl"], default_locale="en")
+            activate("tr")
+            self.assertEqual(last_activated, {})
+            Bundle(["tests/main.ftl"], default_locale="en", max_compiled_locales=2)
+            activate("tr")
+            self.assertEqual(list(last_activated), ["tr"])
+
+    def test_oldest_activations_discarded(self):
+        with mock.patch.object(activator, "track_activations", True), mock.patch(
+            "django_ftl.bundles._last_activated", {}
+        ) as last_activated, mock.patch("django_ftl.bundles.MAX_LOCALES_CACHED", 3):
+            for locale in ["de", "es", "tr", "de", "fr"]:
+                activate(locale)
+            self.assertEqual(list(last_activated), ["tr", "de", "fr"])
+
+    def test_threads(self):
+        bundle = Bundle(
+            ["tests/main.ftl"],
+            default_locale="en",
+            max_compiled_locales=2,
+            use_isolating=False,
+        )
+        expected = {"en": "Simple", "fr-FR": "Facile", "tr": "Basit"}
+        failures = []
+
+        def run(locale):
+            activate(locale)
+            for i in range(50):
+                output = bundle.format("simple")
+                if output != expected[locale]:
+                    failures.append((locale, output))
+
+        threads = [
+            threading.Thread(target=run, args=(locale,))
+            for locale in list(expected) * 3
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(failures, [])
+        self.assertLessEqual(len(bundle._compiled_unit_for_locale), 3)
+
+
 class TestLocaleLookups(TestBase):
     # See https://tools.ietf.org/html/rfc4647#section-3.4
 
@@ -377,3 +1019,78 @@ class TestBundleThreadSafe(TestBase):
                 (2, "Simple"),
             ],
         )
+
+    def test_compile_locales_concurrently(self):
+        # A slow compile of one locale must not block compilation of another.
+        tr_loading = threading.Event()
+        tr_release = threading.Event()
+
+        class SlowFinder(bundles.DjangoMessageFinder):
+            def load(self, locale, path, reloader=None):
+                if locale == "tr":
+                    tr_loading.set()
+                    tr_release.wait(5)
+                return super().load(locale, path, reloader=reloader)
+
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", finder=SlowFinder())
+        tr_thread = threading.Thread(
+            target=bundle.get_compiled_unit_for_locale, args=("tr",)
+        )
+        tr_thread.start()
+        try:
+            self.assertTrue(tr_loading.wait(5))
+            en_thread = threading.Thread(
+                target=bundle.get_compiled_unit_for_locale, args=("en",)
+            )
+            en_thread.start()
+            en_thread.join(5)
+            self.assertFalse(en_thread.is_alive())
+            self.assertIn("en", bundle._compiled_unit_for_locale)
+            self.assertNotIn("tr", bundle._compiled_unit_for_locale)
+        finally:
+            tr_release.set()
+            tr_thread.join()
+        self.assertIn("tr", bundle._compiled_unit_for_locale)
+        self.assertEqual(bundle._locale_locks, {})
+
+    def test_same_locale_compiled_once(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        with mock.patch(
+            "django_ftl.bundles.compile_code", wraps=compile_code
+        ) as compile_code_mock:
+            threads = [
+                threading.Thread(
+                    target=bundle.get_compiled_unit_for_locale, args=("tr",)
+                )
+                for i in range(5)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(compile_code_mock.call_count, 1)
+
+
+class TestBundleAsyncSafe(TestBase):
+    def test_concurrent_tasks(self):
+        # Tasks running concurrently in the same thread must not see each
+        # other's locale.
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", require_activate=True)
+        output = []
+
+        async def task(task_id, locale, other_started, started):
+            activate(locale)
+            started.set()
+            await other_started.wait()
+            output.append((task_id, bundle.format("simple")))
+
+        async def main():
+            started_1 = asyncio.Event()
+            started_2 = asyncio.Event()
+            await asyncio.gather(
+                task(1, "en", started_2, started_1),
+                task(2, "fr-FR", started_1, started_2),
+            )
+
+        asyncio.run(main())
+        self.assertEqual(sorted(output), [(1, "Simple"), (2, "Facile")])
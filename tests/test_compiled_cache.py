@@ -0,0 +1,110 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.test import override_settings
+from fluent_compiler.errors import FluentJunkFound
+from fluent_compiler.resource import FtlResource
+from testfixtures import LogCapture
+
+from django_ftl import activate
+from django_ftl.bundles import Bundle
+from django_ftl.compilation import compile_code
+from django_ftl.compiled_cache import CompiledCache, source_hash
+
+from .base import TestBase
+
+
+class TestCompiledCache(TestBase):
+    def setUp(self):
+        super().setUp()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.cache_dir = self._tmpdir.name
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+        super().tearDown()
+
+    def test_bundle_uses_cache(self):
+        bundle_1 = Bundle(
+            ["tests/main.ftl"], default_locale="en", compiled_cache_dir=self.cache_dir
+        )
+        activate("fr-FR")
+        self.assertEqual(bundle_1.format("simple"), "Facile")
+        self.assertIn("fr-fr", bundle_1._compiled_unit_for_locale)
+        self.assertEqual(
+            len(os.listdir(self.cache_dir)), len(bundle_1._compiled_unit_for_locale)
+        )
+
+        bundle_2 = Bundle(
+            ["tests/main.ftl"], default_locale="en", compiled_cache_dir=self.cache_dir
+        )
+        with mock.patch("django_ftl.bundles.compile_code") as compile_code_mock:
+            self.assertEqual(bundle_2.format("simple"), "Facile")
+            self.assertEqual(
+                bundle_2.format("with-number-argument", {"points": 1234567}),
+                "Points: \u20681\u202f234\u202f567\u2069",
+            )
+        compile_code_mock.assert_not_called()
+
+    def test_from_settings(self):
+        with override_settings(FTL={"COMPILED_CACHE_DIR": self.cache_dir}):
+            bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        self.assertEqual(bundle.format("simple"), "Simple")
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_options_part_of_key(self):
+        Bundle(
+            ["tests/main.ftl"], default_locale="en", compiled_cache_dir=self.cache_dir
+        ).format("simple")
+        bundle = Bundle(
+            ["tests/main.ftl"],
+            default_locale="en",
+            use_isolating=False,
+            compiled_cache_dir=self.cache_dir,
+        )
+        self.assertEqual(
+            bundle.format("with-argument", {"user": "Horace"}), "Hello to Horace."
+        )
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_errors_cached(self):
+        Bundle(
+            ["tests/errors.ftl"], default_locale="en", compiled_cache_dir=self.cache_dir
+        ).check_all(["en"])
+        bundle = Bundle(
+            ["tests/errors.ftl"], default_locale="en", compiled_cache_dir=self.cache_dir
+        )
+        with mock.patch("django_ftl.bundles.compile_code") as compile_code_mock:
+            errors = bundle.check_all(["en"])
+        compile_code_mock.assert_not_called()
+        self.assertEqual(len(errors), 2)
+        assert isinstance(errors[0][1], FluentJunkFound)
+
+    def test_stale_entry(self):
+        cache = CompiledCache(self.cache_dir)
+        resources_1 = [FtlResource.from_string("foo = Foo")]
+        resources_2 = [FtlResource.from_string("foo = Foo 2")]
+        cache.set("key", source_hash(resources_1), compile_code("en", resources_1))
+        self.assertIsNotNone(cache.get("key", source_hash(resources_1)))
+        self.assertIsNone(cache.get("key", source_hash(resources_2)))
+
+        cache.set("key", source_hash(resources_2), compile_code("en", resources_2))
+        self.assertIsNotNone(cache.get("key", source_hash(resources_2)))
+        self.assertEqual(os.listdir(self.cache_dir), ["key.ftlc"])
+
+    def test_corrupt_entry(self):
+        with open(os.path.join(self.cache_dir, "key.ftlc"), "wb") as f:
+            f.write(b"junk")
+        cache = CompiledCache(self.cache_dir)
+        self.assertIsNone(cache.get("key", "x"))
+
+    def test_write_error(self):
+        cache = CompiledCache(self.cache_dir)
+        resources = [FtlResource.from_string("foo = Foo")]
+        with mock.patch("os.replace", side_effect=OSError("disk full")):
+            with LogCapture("django_ftl.compiled_cache") as log:
+                cache.set("key", source_hash(resources), compile_code("en", resources))
+        self.assertIn("Could not write", log.records[0].getMessage())
+        # Temporary file removed
+        self.assertEqual(os.listdir(self.cache_dir), [])
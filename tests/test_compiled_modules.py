@@ -0,0 +1,150 @@
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+
+from django_ftl import activate
+from django_ftl.bundles import Bundle
+from django_ftl.compilation import compile_code
+from django_ftl.compiled_modules import write_module
+
+from .base import TempDirFinder, TestBase
+
+
+@unittest.skipIf(sys.version_info < (3, 9), "ftl_compile requires Python 3.9")
+class TestCompiledModules(TestBase):
+    def setUp(self):
+        super().setUp()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.package = "ftl_compiled_modules_test"
+        self.package_dir = os.path.join(self._tmpdir.name, self.package)
+        os.makedirs(self.package_dir)
+        with open(os.path.join(self.package_dir, "__init__.py"), "w"):
+            pass
+        sys.path.insert(0, self._tmpdir.name)
+        self.addCleanup(sys.path.remove, self._tmpdir.name)
+        self.addCleanup(sys.modules.pop, self.package, None)
+        importlib.invalidate_caches()
+
+    def compile(self, *args):
+        out = StringIO()
+        call_command(
+            "ftl_compile", "--package", self.package, *args, stdout=out, stderr=out
+        )
+        return out.getvalue()
+
+    def test_command(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        output = self.compile("--locale=en", "--locale=tr")
+        path = os.path.join(
+            self.package_dir, bundle._compiled_module_name("tr") + ".py"
+        )
+        self.assertIn(path, output)
+        with open(path) as f:
+            source = f.read()
+        self.assertIn("def simple(message_args, errors):", source)
+        self.assertIn("'Basit'", source)
+        self.assertTrue(os.listdir(os.path.join(self.package_dir, "__pycache__")))
+
+    def test_default_locales(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        self.compile()
+        for locale in ["en", "fr-fr", "tr"]:
+            path = os.path.join(
+                self.package_dir, bundle._compiled_module_name(locale) + ".py"
+            )
+            self.assertTrue(os.path.exists(path), locale)
+
+    def test_missing_default_locale_file(self):
+        # Kept in variables, so that all_bundles() finds them
+        missing_bundle = Bundle(["tests/no_such_file.ftl"], default_locale="en")  # noqa
+        good_bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        output = self.compile("--locale=en")
+        self.assertIn("<Bundle ['tests/no_such_file.ftl']>: skipping en: ", output)
+        path = os.path.join(
+            self.package_dir, good_bundle._compiled_module_name("en") + ".py"
+        )
+        self.assertTrue(os.path.exists(path))
+
+    def test_bundle_imports_module(self):
+        # Kept alive so that the command finds it.
+        bundle_to_compile = Bundle(["tests/main.ftl"], default_locale="en")  # noqa
+        self.compile("--locale=en", "--locale=fr-FR")
+        bundle = Bundle(
+            ["tests/main.ftl"],
+            default_locale="en",
+            compiled_modules_package=self.package,
+        )
+        activate("fr-FR")
+        with mock.patch(
+            "django_ftl.bundles.compile_code", wraps=compile_code
+        ) as compile_code_mock:
+            self.assertEqual(bundle.format("simple"), "Facile")
+            self.assertEqual(
+                bundle.format("with-argument", {"user": "Jean"}),
+                "Bonjour à \u2068Jean\u2069.",
+            )
+        # Only 'fr', which has no FTL files, is compiled.
+        self.assertEqual([c[0][0] for c in compile_code_mock.call_args_list], ["fr"])
+        unit = bundle._compiled_unit_for_locale["fr-fr"]
+        self.assertEqual(unit.message_constants["simple"], "Facile")
+        self.assertIn(
+            self.package_dir, unit.message_functions["simple"].__code__.co_filename
+        )
+
+    def test_setting(self):
+        bundle_to_compile = Bundle(["tests/main.ftl"], default_locale="en")  # noqa
+        self.compile("--locale=en")
+        with override_settings(FTL={"COMPILED_MODULES_PACKAGE": self.package}):
+            bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        with mock.patch("django_ftl.bundles.compile_code") as compile_code:
+            self.assertEqual(bundle.format("simple"), "Simple")
+        compile_code.assert_not_called()
+
+    def test_stale_module_ignored(self):
+        base_dir = self._tmpdir.name
+        os.makedirs(os.path.join(base_dir, "en", "app"))
+        main_ftl = os.path.join(base_dir, "en", "app", "main.ftl")
+        with open(main_ftl, "w") as f:
+            f.write("simple = Simple\n")
+        bundle = Bundle(
+            ["app/main.ftl"],
+            default_locale="en",
+            finder=TempDirFinder(base_dir),
+            compiled_modules_package=self.package,
+            auto_reload=False,
+        )
+        self.compile("--locale=en")
+        with open(main_ftl, "w") as f:
+            f.write("simple = Simple 2\n")
+        self.assertEqual(bundle.format("simple"), "Simple 2")
+
+    def test_missing_module(self):
+        bundle = Bundle(
+            ["tests/main.ftl"],
+            default_locale="en",
+            compiled_modules_package=self.package,
+        )
+        self.assertEqual(bundle.format("simple"), "Simple")
+
+    def test_errors_not_written(self):
+        bundle = Bundle(["tests/errors.ftl"], default_locale="en")
+        resources = bundle._load_resources("en")
+        path = write_module(
+            self.package_dir, "errors", "en", resources, bundle._compile_options()
+        )
+        self.assertIsNone(path)
+        self.assertFalse(os.path.exists(os.path.join(self.package_dir, "errors.py")))
+
+    def test_command_requires_package(self):
+        self.assertRaises(CommandError, call_command, "ftl_compile")
+        self.assertRaises(
+            CommandError, call_command, "ftl_compile", "--package=no_such_package"
+        )
@@ -0,0 +1,137 @@
+from django.test import override_settings
+from testfixtures import LogCapture
+
+from django_ftl import activate
+from django_ftl.bundles import Bundle
+from django_ftl.error_reporting import ErrorReporter, flush_error_reporters
+
+from .base import TestBase
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestErrorReporter(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        self.reporter = ErrorReporter(interval=60, max_keys=2)
+        self.reporter.clock = self.clock
+        self.reporter._last_flush = self.clock.now
+
+    def messages(self, log):
+        return [r.getMessage() for r in log.records]
+
+    def test_first_logged_repeats_suppressed(self):
+        with LogCapture() as log:
+            for i in range(5):
+                self.reporter.report("en", "msg", {"x": i}, KeyError("x"))
+        self.assertEqual(
+            self.messages(log),
+            [
+                "FTL exception for locale [en], message 'msg', args {'x': 0}: KeyError('x')"
+            ],
+        )
+        self.assertEqual(self.reporter.counts(), {("en", "msg", "KeyError"): 5})
+
+    def test_keys(self):
+        with LogCapture() as log:
+            self.reporter.report("en", "msg", {}, KeyError("x"))
+            self.reporter.report("en", "msg", {}, TypeError("x"))
+            self.reporter.report("tr", "msg", {}, KeyError("x"))
+        self.assertEqual(len(log.records), 3)
+        # Limited to 2 keys
+        self.assertEqual(
+            self.reporter.counts(),
+            {("en", "msg", "TypeError"): 1, ("tr", "msg", "KeyError"): 1},
+        )
+
+    def test_logged_again_after_interval(self):
+        with LogCapture() as log:
+            for i in range(3):
+                self.reporter.report("en", "msg", {}, KeyError("x"))
+            self.clock.now += 61
+            self.reporter.report("en", "msg", {}, KeyError("x"))
+        self.assertEqual(len(log.records), 2)
+        self.assertIn("(2 similar errors not logged)", self.messages(log)[1])
+
+    def test_flush(self):
+        with LogCapture() as log:
+            for i in range(3):
+                self.reporter.report("en", "msg", {}, KeyError("x"))
+            self.clock.now += 61
+            # A different error triggers reporting of the suppressed counts
+            self.reporter.report("en", "other", {}, KeyError("x"))
+        self.assertEqual(
+            self.messages(log)[1:],
+            [
+                "FTL exception for locale [en], message 'other', args {}: KeyError('x')",
+                "FTL exception for locale [en], message 'msg': 2 more KeyError errors not logged",
+            ],
+        )
+        with LogCapture() as log:
+            self.reporter.flush()
+        self.assertEqual(len(log.records), 0)
+
+    def test_flushed_without_further_errors(self):
+        with LogCapture() as log:
+            for i in range(3):
+                self.reporter.report("en", "msg", {}, KeyError("x"))
+            # Not due yet
+            flush_error_reporters()
+            self.assertEqual(len(log.records), 1)
+            self.clock.now += 61
+            # As at the end of a request
+            flush_error_reporters()
+        self.assertEqual(
+            self.messages(log)[1:],
+            [
+                "FTL exception for locale [en], message 'msg': 2 more KeyError errors not logged",
+            ],
+        )
+
+    def test_flushed_at_exit(self):
+        with LogCapture() as log:
+            for i in range(3):
+                self.reporter.report("en", "msg", {}, KeyError("x"))
+            flush_error_reporters(force=True)
+        # Other reporters may log too
+        self.assertIn(
+            "FTL exception for locale [en], message 'msg': 2 more KeyError errors not logged",
+            self.messages(log),
+        )
+
+    def test_interval_zero(self):
+        self.reporter.interval = 0
+        with LogCapture() as log:
+            for i in range(3):
+                self.reporter.report("en", "msg", {}, KeyError("x"))
+        self.assertEqual(len(log.records), 3)
+        self.assertEqual(self.reporter.counts(), {("en", "msg", "KeyError"): 3})
+
+
+class TestBundleErrorReporting(TestBase):
+    def test_error_counts(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        activate("en")
+        with LogCapture() as log:
+            for i in range(10):
+                bundle.format("with-argument", {})
+        self.assertEqual(len(log.records), 1)
+        self.assertEqual(
+            bundle.error_counts(), {("en", "with-argument", "FluentReferenceError"): 10}
+        )
+
+    @override_settings(FTL={"ERROR_LOG_INTERVAL": 0})
+    def test_setting(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        activate("en")
+        with LogCapture() as log:
+            for i in range(3):
+                bundle.format("with-argument", {})
+        self.assertEqual(len(log.records), 3)
@@ -0,0 +1,126 @@
+import os
+import signal
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.core.signals import request_started
+from django.test import override_settings
+from testfixtures import LogCapture
+
+from django_ftl import activate, hot_reload
+from django_ftl.bundles import Bundle, FileNotFoundError
+
+from .base import TempDirFinder, TestBase
+
+
+class HotReloadTestBase(TestBase):
+    def setUp(self):
+        super().setUp()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.base_dir = self._tmpdir.name
+        self.write("en", "simple = Simple\n")
+        self.write("tr", "simple = Basit\n")
+        self.bundle = Bundle(
+            ["app/main.ftl"],
+            default_locale="en",
+            finder=TempDirFinder(self.base_dir),
+            auto_reload=False,
+        )
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+        super().tearDown()
+
+    def write(self, locale, text):
+        locale_dir = os.path.join(self.base_dir, locale, "app")
+        os.makedirs(locale_dir, exist_ok=True)
+        path = os.path.join(locale_dir, "main.ftl")
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+
+class TestBundleHotReload(HotReloadTestBase):
+    def test_hot_reload(self):
+        activate("tr")
+        self.assertEqual(self.bundle.format("simple"), "Basit")
+        self.write("tr", "simple = Basit 2\n")
+
+        compile = self.bundle._compile
+
+        def compile_and_format(locale, resources):
+            # While compiling, the old units are still used.
+            self.assertEqual(self.bundle.format("simple"), "Basit")
+            return compile(locale, resources)
+
+        with mock.patch.object(self.bundle, "_compile", compile_and_format):
+            self.bundle.hot_reload()
+        self.assertEqual(set(self.bundle._compiled_unit_for_locale), {"tr", "en"})
+
+        with mock.patch("django_ftl.bundles.compile_code") as compile_code:
+            self.assertEqual(self.bundle.format("simple"), "Basit 2")
+        compile_code.assert_not_called()
+
+    def test_error_keeps_old_units(self):
+        activate("tr")
+        self.bundle.format("simple")
+        os.unlink(os.path.join(self.base_dir, "en", "app", "main.ftl"))
+        self.assertRaises(FileNotFoundError, self.bundle.hot_reload)
+        self.assertEqual(self.bundle.format("simple"), "Basit")
+
+    def test_hot_reload_bundles_background(self):
+        activate("tr")
+        self.bundle.format("simple")
+        self.write("tr", "simple = Basit 2\n")
+        thread = hot_reload.hot_reload_bundles(background=True)
+        thread.join()
+        self.assertEqual(self.bundle.format("simple"), "Basit 2")
+
+    def test_hot_reload_bundles_logs_errors(self):
+        self.bundle.format("simple")
+        os.unlink(os.path.join(self.base_dir, "en", "app", "main.ftl"))
+        with LogCapture("django_ftl.hot_reload") as log:
+            hot_reload.hot_reload_bundles()
+        self.assertIn("Error hot reloading", log.records[0].getMessage())
+
+
+class TestTriggers(HotReloadTestBase):
+    def test_version_file(self):
+        version_file = os.path.join(self.base_dir, "version")
+        watcher = hot_reload.VersionFileWatcher(version_file, interval=0)
+        self.addCleanup(watcher.disconnect)
+        with mock.patch("django_ftl.hot_reload.hot_reload_bundles") as reload_bundles:
+            request_started.send(sender=None)
+            reload_bundles.assert_not_called()
+            with override_settings(FTL={"HOT_RELOAD_VERSION_FILE": version_file}):
+                call_command("ftl_hot_reload", stdout=StringIO())
+            request_started.send(sender=None)
+            reload_bundles.assert_called_once_with(background=True)
+            request_started.send(sender=None)
+            reload_bundles.assert_called_once_with(background=True)
+
+    def test_command_changes_version(self):
+        version_file = os.path.join(self.base_dir, "version")
+        with override_settings(FTL={"HOT_RELOAD_VERSION_FILE": version_file}):
+            call_command("ftl_hot_reload", stdout=StringIO())
+            version = hot_reload.read_version(version_file)
+            call_command("ftl_hot_reload", stdout=StringIO())
+        self.assertNotEqual(hot_reload.read_version(version_file), version)
+
+    def test_command_requires_version_file(self):
+        self.assertRaises(CommandError, call_command, "ftl_hot_reload")
+
+    def test_signal(self):
+        old_handler = signal.getsignal(signal.SIGUSR2)
+        self.addCleanup(signal.signal, signal.SIGUSR2, old_handler)
+        hot_reload.install_signal_handler("SIGUSR2")
+        with mock.patch("django_ftl.hot_reload.hot_reload_bundles") as reload_bundles:
+            os.kill(os.getpid(), signal.SIGUSR2)
+            for i in range(100):
+                if reload_bundles.called:
+                    break
+                time.sleep(0.01)
+        reload_bundles.assert_called_once_with(background=False)
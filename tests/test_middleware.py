@@ -1,11 +1,16 @@
+import asyncio
+import unittest
+
+from django.http import HttpResponse
 from django.shortcuts import render
 from django.template.response import TemplateResponse
-from django.test import override_settings
+from django.test import RequestFactory, override_settings
 from django.utils.translation import override as dj_override
 
+from django_ftl import middleware
 from django_ftl.bundles import NoLocaleSet
 
-from .base import WebTestBase
+from .base import TestBase, WebTestBase
 from .ftl_bundles import simple_view as simple_view_bundle
 
 
@@ -87,3 +92,63 @@ class TestActivateFromLanguageCodeMiddleware(WebTestBase):
         with dj_override("tr"):
             self.get_url("test_middleware.simple_view_template_response_prefixed")
             self.assertTextPresent("Şimdiki dil kodu tr")
+
+
+async def async_view(request):
+    await asyncio.sleep(0)
+    return HttpResponse(simple_view_bundle.format("simple-title"))
+
+
+@unittest.skipIf(
+    middleware.sync_and_async_middleware is None, "Async middleware needs Django 3.1+"
+)
+class TestAsyncMiddleware(TestBase):
+    def run_requests(self, handler, requests):
+        async def main():
+            return await asyncio.gather(*[handler(r) for r in requests])
+
+        return [r.content.decode("utf-8") for r in asyncio.run(main())]
+
+    def test_activate_from_request_language_code(self):
+        handler = middleware.activate_from_request_language_code(async_view)
+        self.assertTrue(asyncio.iscoroutinefunction(handler))
+        factory = RequestFactory()
+        request_en = factory.get("/")
+        request_en.LANGUAGE_CODE = "en"
+        request_tr = factory.get("/")
+        request_tr.LANGUAGE_CODE = "tr"
+        self.assertEqual(
+            self.run_requests(handler, [request_en, request_tr]),
+            ["A Web Page Title", "Web Sayfasının Başlığı"],
+        )
+        self.assertRaises(NoLocaleSet, simple_view_bundle.format, "simple-title")
+
+    def test_activate_from_request_session(self):
+        handler = middleware.activate_from_request_session(async_view)
+        self.assertTrue(asyncio.iscoroutinefunction(handler))
+        factory = RequestFactory()
+        request_en = factory.get("/")
+        request_tr = factory.get("/", HTTP_ACCEPT_LANGUAGE="tr")
+        for request in [request_en, request_tr]:
+            request.session = {}
+        if middleware.LANGUAGE_SESSION_KEY is not None:
+            # Django < 4 uses the session, not Accept-Language.
+            request_tr.session[middleware.LANGUAGE_SESSION_KEY] = "tr"
+        self.assertEqual(
+            self.run_requests(handler, [request_en, request_tr]),
+            ["A Web Page Title", "Web Sayfasının Başlığı"],
+        )
+        self.assertEqual(request_tr.LANGUAGE_CODE, "tr")
+
+    def test_sync(self):
+        def view(request):
+            return HttpResponse("")
+
+        self.assertFalse(
+            asyncio.iscoroutinefunction(
+                middleware.activate_from_request_language_code(view)
+            )
+        )
+        self.assertFalse(
+            asyncio.iscoroutinefunction(middleware.activate_from_request_session(view))
+        )
@@ -0,0 +1,107 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+
+from django_ftl import activate
+from django_ftl.bundles import Bundle, DjangoMessageFinder, FileNotFoundError
+from django_ftl.packed import PackedMessageFinder, pack
+
+from .base import TempDirFinder, TestBase
+
+
+class TestPackedMessageFinder(TestBase):
+    def setUp(self):
+        super().setUp()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.packed_file = os.path.join(self._tmpdir.name, "ftl.pack")
+
+    def test_same_as_django_finder(self):
+        django_finder = DjangoMessageFinder()
+        count = pack(django_finder, self.packed_file)
+        self.assertEqual(count, len(django_finder.index))
+        finder = PackedMessageFinder(self.packed_file)
+        self.assertEqual(finder.available_locales(), django_finder.available_locales())
+        for locale, path in django_finder.index:
+            self.assertEqual(
+                finder.load(locale, path).text, django_finder.load(locale, path).text
+            )
+
+    def test_no_files_opened_after_index(self):
+        pack(DjangoMessageFinder(), self.packed_file)
+        finder = PackedMessageFinder(self.packed_file)
+        finder.load("en", "tests/main.ftl")
+        with mock.patch("builtins.open") as open_:
+            self.assertIn("Facile", finder.load("fr-FR", "tests/main.ftl").text)
+        open_.assert_not_called()
+
+    def test_missing_file(self):
+        pack(DjangoMessageFinder(), self.packed_file)
+        finder = PackedMessageFinder(self.packed_file)
+        self.assertRaises(FileNotFoundError, finder.load, "de", "tests/main.ftl")
+        self.assertRaises(FileNotFoundError, finder.load, "en", "tests/missing.ftl")
+
+    def test_invalid_file(self):
+        for contents in [b"", b"not a packed file at all"]:
+            with open(self.packed_file, "wb") as f:
+                f.write(contents)
+            finder = PackedMessageFinder(self.packed_file)
+            self.assertRaises(ImproperlyConfigured, finder.load, "en", "tests/main.ftl")
+
+    def test_invalidate(self):
+        base_dir = self._tmpdir.name
+        os.makedirs(os.path.join(base_dir, "en", "app"))
+        with open(os.path.join(base_dir, "en", "app", "main.ftl"), "w") as f:
+            f.write("simple = Simple\n")
+        pack(TempDirFinder(base_dir), self.packed_file)
+        bundle = Bundle(
+            ["app/main.ftl"],
+            default_locale="en",
+            finder=PackedMessageFinder(self.packed_file),
+            auto_reload=False,
+        )
+        self.assertEqual(bundle.format("simple"), "Simple")
+
+        with open(os.path.join(base_dir, "en", "app", "main.ftl"), "w") as f:
+            f.write("simple = Simple 2\n")
+        pack(TempDirFinder(base_dir), self.packed_file)
+        bundle.hot_reload()
+        self.assertEqual(bundle.format("simple"), "Simple 2")
+
+    def test_finder_setting(self):
+        pack(DjangoMessageFinder(), self.packed_file)
+        with override_settings(
+            FTL={
+                "FINDER": "django_ftl.packed.PackedMessageFinder",
+                "PACKED_FILE": self.packed_file,
+            }
+        ):
+            bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        self.assertIsInstance(bundle._finder, PackedMessageFinder)
+        activate("tr")
+        self.assertEqual(bundle.format("simple"), "Basit")
+
+    def test_requires_path(self):
+        self.assertRaises(ImproperlyConfigured, PackedMessageFinder)
+
+
+class TestPackCommand(TestBase):
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            packed_file = os.path.join(tmpdir, "ftl.pack")
+            with override_settings(FTL={"PACKED_FILE": packed_file}):
+                out = StringIO()
+                call_command("ftl_pack", stdout=out)
+                finder = PackedMessageFinder()
+            self.assertIn(f"into {packed_file}", out.getvalue())
+            self.assertIn(
+                "tests/main.ftl", finder.load("en", "tests/main.ftl").filename
+            )
+
+    def test_command_requires_output(self):
+        self.assertRaises(CommandError, call_command, "ftl_pack")
@@ -0,0 +1,99 @@
+import gc
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import override_settings
+from testfixtures import LogCapture
+
+from django_ftl import activate
+from django_ftl.bundles import Bundle
+from django_ftl.stats import snapshot, snapshot_json
+
+from .base import TestBase
+
+
+class TestBundleStats(TestBase):
+    def test_disabled_by_default(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        self.assertIsNone(bundle.stats())
+        self.assertNotIn("format", vars(bundle))
+
+    def test_counters(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", collect_stats=True)
+        activate("tr")
+        bundle.format("simple")
+        bundle.format("simple")
+        with LogCapture():
+            # Only in 'en'
+            bundle.format("missing-from-others")
+            bundle.format("with-argument", {"user": "Jane"})
+            bundle.format("missing")
+
+        stats = bundle.stats()
+        self.assertEqual(stats["message_cache"], {"hits": 1, "misses": 4})
+        self.assertEqual(stats["lookups"], {"fallbacks": 2, "missing": 1})
+        # Lookup errors in 'tr' for the last three, and in 'en' for 'missing'
+        self.assertEqual(stats["message_errors"], 4)
+        self.assertEqual(stats["format_calls"], 5)
+        self.assertEqual(set(stats["compiles"]), {"tr", "en"})
+        self.assertEqual(stats["compiles"]["tr"]["count"], 1)
+        self.assertEqual(stats["compiles"]["tr"]["messages"], 1)
+        self.assertGreater(stats["compiles"]["tr"]["seconds"], 0)
+        self.assertEqual(stats["format_latency"]["samples"], 0)
+
+    def test_format_lazy(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", collect_stats=True)
+        activate("en")
+        self.assertEqual(str(bundle.format_lazy("simple")), "Simple")
+        self.assertEqual(bundle.stats()["format_calls"], 1)
+
+    @override_settings(FTL={"COLLECT_STATS": True, "STATS_LATENCY_SAMPLE_INTERVAL": 2})
+    def test_latency_sampling(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        activate("en")
+        for i in range(10):
+            bundle.format("simple")
+        latency = bundle.stats()["format_latency"]
+        self.assertEqual(latency["samples"], 5)
+        self.assertEqual(sum(latency["buckets"].values()), 5)
+        self.assertIn("+Inf", latency["buckets"])
+
+    def test_compile_with_executor(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", collect_stats=True)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            bundle.compile_locales(["en", "tr"], executor=executor)
+        self.assertEqual(set(bundle.stats()["compiles"]), {"en", "tr"})
+
+    def test_result_cache(self):
+        bundle = Bundle(
+            ["tests/main.ftl"],
+            default_locale="en",
+            collect_stats=True,
+            result_cache_size=10,
+        )
+        activate("en")
+        bundle.format("with-argument", {"user": "Jane"})
+        self.assertEqual(bundle.stats()["result_cache"]["misses"], 1)
+
+
+class TestSnapshot(TestBase):
+    def test_snapshot(self):
+        gc.collect()
+        bundles = [
+            Bundle(["tests/main.ftl"], default_locale="en", collect_stats=True)
+            for i in range(2)
+        ]
+        Bundle(["tests/main.ftl"], default_locale="en")
+        activate("en")
+        for bundle in bundles:
+            bundle.format("simple")
+
+        data = snapshot()
+        ours = [
+            b for b in data["bundles"] if b["bundle"] == "<Bundle ['tests/main.ftl']>"
+        ]
+        self.assertEqual(len(ours), 2)
+        self.assertGreaterEqual(data["totals"]["format_calls"], 2)
+        self.assertGreaterEqual(data["totals"]["compiles"]["en"]["count"], 2)
+        self.assertNotIn("bundle", data["totals"])
+        self.assertEqual(json.loads(snapshot_json())["pid"], data["pid"])
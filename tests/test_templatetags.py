@@ -1,8 +1,11 @@
 import re
+from unittest import mock
 
-from django.template import Context, Template
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import override_settings
+from testfixtures import LogCapture
 
-from django_ftl import activate
+from django_ftl import activate, deactivate
 from django_ftl.bundles import Bundle
 
 from .base import TestBase
@@ -215,3 +218,160 @@ class TestWithFtlTag(TestBase):
         """
         )
         self.assertRaises(ValueError, t.render, Context({}))
+
+
+class TestFtlMsgsTag(TestBase):
+    def setUp(self):
+        activate("en")
+
+    def test_good(self):
+        t = Template(
+            """
+        {% load ftl %}
+        {% ftlconf bundle='tests.test_templatetags.main_bundle' %}
+        {% ftlmsgs simple='simple' missing='missing-from-others' as msgs %}
+        {{ msgs.simple }}, {{ msgs.missing }}
+        """
+        )
+        self.assertEqual(t.render(Context({})).strip(), "Simple, Missing from others")
+        activate("tr")
+        self.assertEqual(t.render(Context({})).strip(), "Basit, Missing from others")
+
+    def test_same_message_twice(self):
+        t = Template(
+            """
+        {% load ftl %}
+        {% ftlconf bundle='tests.test_templatetags.main_bundle' %}
+        {% ftlmsgs a='simple' b='simple' as msgs %}
+        {{ msgs.a }}, {{ msgs.b }}
+        """
+        )
+        self.assertEqual(t.render(Context({})).strip(), "Simple, Simple")
+
+    def test_no_bundle(self):
+        t = Template(
+            """
+        {% load ftl %}
+        {% ftlmsgs simple='simple' as msgs %}
+        """
+        )
+        self.assertRaises(ValueError, t.render, Context({}))
+
+
+class TestFtlMsgTag(TestBase):
+    def setUp(self):
+        activate("en")
+
+    def test_literal_args_rendered_once_per_locale(self):
+        t = Template(
+            """
+        {% load ftl %}
+        {% ftlconf bundle='tests.test_templatetags.main_bundle' %}
+        {% ftlmsg 'with-argument' user='Horace' %}
+        """
+        )
+        with mock.patch.object(main_bundle, "format", wraps=main_bundle.format) as m:
+            self.assertEqual(t.render(Context({})).strip(), "Hello to Horace.")
+            self.assertEqual(t.render(Context({})).strip(), "Hello to Horace.")
+            self.assertEqual(m.call_count, 1)
+            activate("tr")
+            self.assertEqual(t.render(Context({})).strip(), "Hello to Horace.")
+            self.assertEqual(m.call_count, 2)
+
+    def test_literal_args_rendered_again_after_reload(self):
+        t = Template(
+            """
+        {% load ftl %}
+        {% ftlconf bundle='tests.test_templatetags.main_bundle' %}
+        {% ftlmsg 'simple' %}
+        """
+        )
+        with mock.patch.object(main_bundle, "format", wraps=main_bundle.format) as m:
+            t.render(Context({}))
+            main_bundle.reload()
+            self.assertEqual(t.render(Context({})).strip(), "Simple")
+            self.assertEqual(m.call_count, 2)
+
+    def test_literal_args_not_memoized_without_locale(self):
+        # The output depends on the default locale/settings, which can change.
+        deactivate()
+        t = Template(
+            """
+        {% load ftl %}
+        {% ftlconf bundle='tests.test_templatetags.main_bundle' %}
+        {% ftlmsg 'simple' %}
+        """
+        )
+        with mock.patch.object(main_bundle, "format", wraps=main_bundle.format) as m:
+            t.render(Context({}))
+            t.render(Context({}))
+        self.assertEqual(m.call_count, 2)
+
+    def test_literal_args_memoized_counted_in_stats(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en", collect_stats=True)
+        t = Template(
+            """
+        {% load ftl %}
+        {% ftlconf bundle=bundle %}
+        {% ftlmsg 'simple' %}
+        """
+        )
+        for i in range(3):
+            t.render(Context({"bundle": bundle}))
+        self.assertEqual(bundle.stats()["format_calls"], 3)
+
+    @override_settings(FTL={"ERROR_LOG_INTERVAL": 0})
+    def test_literal_args_with_errors_not_memoized(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        t = Template(
+            """
+        {% load ftl %}
+        {% ftlconf bundle=bundle %}
+        {% ftlmsg 'with-argument' %}
+        """
+        )
+        with LogCapture() as log:
+            t.render(Context({"bundle": bundle}))
+            t.render(Context({"bundle": bundle}))
+        self.assertEqual(len(log.records), 2)
+
+    def test_variable_args(self):
+        t = Template(
+            """
+        {% load ftl %}
+        {% ftlconf bundle='tests.test_templatetags.main_bundle' %}
+        {% ftlmsg msg_id user=username %}
+        """
+        )
+        self.assertEqual(
+            t.render(Context({"msg_id": "with-argument", "username": "Jane"})).strip(),
+            "Hello to Jane.",
+        )
+        self.assertEqual(
+            t.render(Context({"msg_id": "with-argument", "username": "Joe"})).strip(),
+            "Hello to Joe.",
+        )
+
+    def test_as_var(self):
+        t = Template(
+            """
+        {% load ftl %}
+        {% ftlconf bundle='tests.test_templatetags.main_bundle' %}
+        {% ftlmsg 'simple' as simple %}[{{ simple }}]
+        """
+        )
+        self.assertEqual(t.render(Context({})).strip(), "[Simple]")
+
+    def test_ftlconf_bad_kwarg(self):
+        t = """
+        {% load ftl %}
+        {% ftlconf xyz='abc' %}
+        """
+        self.assertRaises(TemplateSyntaxError, Template, t)
+
+    def test_no_message_id(self):
+        t = """
+        {% load ftl %}
+        {% ftlmsg %}
+        """
+        self.assertRaises(TemplateSyntaxError, Template, t)
@@ -0,0 +1,121 @@
+import platform
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+from django.core.management import call_command
+from django.test import override_settings
+
+from django_ftl import activate
+from django_ftl.bundles import Bundle, all_bundles
+
+from .base import TestBase
+from .ftl_bundles import simple_view as simple_view_bundle
+
+
+def os_name():
+    return platform.system()
+
+
+class TestCompileLocales(TestBase):
+    def test_serial(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        units = bundle.compile_locales(["en", "fr-FR", "tr"])
+        self.assertEqual(list(units.keys()), ["en", "fr-fr", "tr"])
+        self.assertEqual(units["tr"].locale, "tr")
+
+    def test_thread_pool(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            units = bundle.compile_locales(["en", "fr-FR", "tr"], executor=executor)
+        self.assertEqual(list(units.keys()), ["en", "fr-fr", "tr"])
+        activate("tr")
+        self.assertEqual(bundle.format("simple"), "Basit")
+
+    def test_process_pool(self):
+        bundle = Bundle(
+            ["tests/main.ftl", "tests/functions.ftl"],
+            default_locale="en",
+            functions={"OSNAME": os_name},
+        )
+        bundle.get_compiled_unit_for_locale("en")
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            units = bundle.compile_locales(["en", "fr-FR", "tr"], executor=executor)
+        self.assertIs(units["en"], bundle.get_compiled_unit_for_locale("en"))
+        activate("fr-FR")
+        self.assertEqual(bundle.format("simple"), "Facile")
+        self.assertEqual(
+            bundle.format("with-number-argument", {"points": 1234567}),
+            "Points: \u20681\u202f234\u202f567\u2069",
+        )
+        self.assertEqual(bundle.format("hello"), f"Hello {platform.system()} user!")
+
+    def test_check_all_with_executor(self):
+        bundle = Bundle(["tests/errors.ftl"], default_locale="en")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            errors = bundle.check_all(["en", "tr"], executor=executor)
+        self.assertEqual(len(errors), 2)
+
+
+class TestWarmup(TestBase):
+    def test_registry(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        self.assertIn(bundle, all_bundles())
+        self.assertIn(simple_view_bundle, all_bundles())
+
+    def test_warmup(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        timings = bundle.warmup(["en", "tr"])
+        self.assertEqual(list(timings.keys()), ["en", "tr"])
+        self.assertEqual(set(bundle._compiled_unit_for_locale.keys()), {"en", "tr"})
+
+    def test_warmup_default_locale(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        bundle.warmup()
+        self.assertEqual(list(bundle._compiled_unit_for_locale.keys()), ["en"])
+
+    @override_settings(
+        FTL={
+            "PRELOAD_BUNDLES": True,
+            "PRELOAD_LOCALES": ["en", "tr"],
+            "PRELOAD_GC_FREEZE": True,
+        }
+    )
+    def test_preload_on_ready(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        with mock.patch("gc.freeze") as freeze:
+            apps.get_app_config("django_ftl").ready()
+        freeze.assert_called_once_with()
+        self.assertEqual(set(bundle._compiled_unit_for_locale.keys()), {"en", "tr"})
+        self.assertIn("tr", simple_view_bundle._compiled_unit_for_locale)
+
+    def test_no_preload_on_ready_by_default(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        apps.get_app_config("django_ftl").ready()
+        self.assertEqual(bundle._compiled_unit_for_locale, {})
+
+    def test_warmup_with_executor(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            timings = bundle.warmup(["en", "tr"], executor=executor)
+        self.assertEqual(list(timings.keys()), ["en", "tr"])
+        self.assertEqual(set(bundle._compiled_unit_for_locale.keys()), {"en", "tr"})
+
+    def test_ftl_warmup_command(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")  # noqa
+        out = StringIO()
+        call_command("ftl_warmup", "--locale=en", "--locale=fr-FR", stdout=out)
+        output = out.getvalue()
+        self.assertIn("<Bundle ['tests/main.ftl']>: ", output)
+        self.assertIn("<Bundle ['tests/simple_view.ftl']>: ", output)
+        self.assertIn("  fr-fr: ", output)
+        self.assertIn("Total: ", output)
+
+    def test_ftl_warmup_command_processes(self):
+        bundle = Bundle(["tests/main.ftl"], default_locale="en")
+        out = StringIO()
+        call_command(
+            "ftl_warmup", "--locale=en", "--locale=tr", "--processes=2", stdout=out
+        )
+        self.assertEqual(set(bundle._compiled_unit_for_locale.keys()), {"en", "tr"})